@@ -79,6 +79,9 @@ DEFAULT_CATEGORIES = [
     {"name": "Nutrition"}
 ]
 
+# Category names resolved once at import, de-duplicated in declaration order
+DEFAULT_CATEGORY_NAMES = tuple(dict.fromkeys(cat["name"] for cat in DEFAULT_CATEGORIES))
+
 # Helper function to validate configuration
 def validate_config():
     """Validate critical configuration settings"""
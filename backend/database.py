@@ -1,6 +1,7 @@
 import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import declarative_base, sessionmaker
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import declarative_base, raiseload, sessionmaker
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from urllib.parse import quote_plus
@@ -27,7 +28,11 @@ DATABASE_URL = get_database_url()
 # =========================
 #  ENGINE & SESSION
 # =========================
-engine = create_engine(DATABASE_URL, echo=False)  # Set echo=True for SQL debugging
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,  # Set echo=True for SQL debugging
+    pool_size=20,  # Room for thread-pooled maintenance scripts
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -143,6 +148,41 @@ def init_categories():
     finally:
         db.close()
 
+# Set SEIKATSU_STRICT_ORM=1 (e.g. in CI) to turn accidental lazy loads into errors
+STRICT_ORM = os.getenv("SEIKATSU_STRICT_ORM", "").lower() in ("1", "true")
+
+if STRICT_ORM:
+    @event.listens_for(Session, "do_orm_execute")
+    def _raise_on_lazy_load(orm_execute_state):
+        """Make every ORM SELECT raise instead of lazy loading a relationship (N+1)."""
+        if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+            orm_execute_state.statement = orm_execute_state.statement.options(
+                raiseload("*", sql_only=True)
+            )
+
+@contextmanager
+def count_queries(bind=None):
+    """
+    Count SQL statements executed inside the block.
+    
+    Args:
+        bind: Engine or connection to watch (default: the application engine)
+        
+    Yields:
+        List that receives each executed SQL statement; use len() for the count
+    """
+    bind = engine if bind is None else bind
+    statements = []
+    
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(bind, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", _record)
+
 def check_db_connection():
     """Check if database connection works"""
     try:
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from datetime import datetime
@@ -42,6 +42,9 @@ async def startup_event():
         print("✅ Database initialized successfully")
     else:
         print("❌ Database connection failed - app may not function properly")
+    
+    # Build the OpenAPI schema now so the first /docs request doesn't pay for it
+    app.openapi()
 
 # ============ ROUTES ============ #
 
@@ -69,7 +72,8 @@ def read_journals(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
     """Get all journal entries for a user"""
     if limit > 100:
         limit = 100  # Prevent large requests
-    return crud.get_journals(db, user_id=1, skip=skip, limit=limit)
+    journals = crud.get_journals(db, user_id=1, skip=skip, limit=limit)
+    return Response(content=schemas.dump_journals(journals), media_type="application/json")
 
 @app.get("/journal/{journal_id}", response_model=schemas.Journal)
 def read_journal(journal_id: int, db: Session = Depends(get_db)):
@@ -109,7 +113,8 @@ def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """Get all tasks for a user"""
     if limit > 100:
         limit = 100  # Prevent large requests
-    return crud.get_tasks(db, user_id=1, skip=skip, limit=limit)
+    tasks = crud.get_tasks(db, user_id=1, skip=skip, limit=limit)
+    return Response(content=schemas.dump_tasks(tasks), media_type="application/json")
 
 @app.get("/tasks/{task_id}", response_model=schemas.Task)
 def read_task(task_id: int, db: Session = Depends(get_db)):
@@ -167,12 +172,14 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
 @app.get("/tasks/completed/", response_model=list[schemas.Task])
 def get_completed_tasks(db: Session = Depends(get_db)):
     """Get all completed tasks for a user"""
-    return crud.get_completed_tasks(db, user_id=1)
+    tasks = crud.get_completed_tasks(db, user_id=1)
+    return Response(content=schemas.dump_tasks(tasks), media_type="application/json")
 
 @app.get("/tasks/pending/", response_model=list[schemas.Task])
 def get_pending_tasks(db: Session = Depends(get_db)):
     """Get all pending tasks for a user"""
-    return crud.get_pending_tasks(db, user_id=1)
+    tasks = crud.get_pending_tasks(db, user_id=1)
+    return Response(content=schemas.dump_tasks(tasks), media_type="application/json")
 
 # ---- LEVELS/XP ENDPOINTS ---- #
 @app.get("/user/stats", response_model=schemas.UserStats)
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Integer, String, Boolean, Date, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -41,6 +41,16 @@ class Category(Base):
 # ===================== #
 class Level(Base):
     __tablename__ = "levels"
+    __table_args__ = (
+        # Per-user level lookups (radar data, XP awards); on PostgreSQL the
+        # included columns make them index-only scans. Unique: one level row
+        # per user and category
+        Index(
+            "ix_levels_user_category", "user_id", "category_id",
+            unique=True,
+            postgresql_include=["level", "xp"],
+        ),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -59,6 +69,14 @@ class Level(Base):
 # ===================== #
 class Journal(Base):
     __tablename__ = "journals"
+    __table_args__ = (
+        # Keyset pagination for exports: WHERE user_id = ? ORDER BY created_at, id;
+        # mood is included so mood trend queries are index-only on PostgreSQL
+        Index(
+            "ix_journals_user_created_id", "user_id", "created_at", "id",
+            postgresql_include=["mood"],
+        ),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -79,6 +97,22 @@ class Journal(Base):
 # ===================== #
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination for exports: WHERE user_id = ? ORDER BY created_at, id
+        Index("ix_tasks_user_created_id", "user_id", "created_at", "id"),
+        # Due-date ranges (today's tasks): WHERE user_id = ? AND due_date >= ? AND due_date < ?
+        Index("ix_tasks_user_due", "user_id", "due_date"),
+        # Open tasks by due date (upcoming, overdue), already in ORDER BY due_date order:
+        # WHERE user_id = ? AND is_completed = false AND due_date <range> ORDER BY due_date
+        Index("ix_tasks_user_status_due", "user_id", "is_completed", "due_date"),
+        # Completion-date ranges (streaks, recent activity):
+        # WHERE user_id = ? AND is_completed = true AND completed_at >= ?
+        # Partial on PostgreSQL, since only completed tasks are queried this way
+        Index(
+            "ix_tasks_user_completed", "user_id", "completed_at",
+            postgresql_where=text("is_completed = true"),
+        ),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -119,4 +153,18 @@ class UserStats(Base):
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    user: Mapped["User"] = relationship("User", back_populates="user_stats")
\ No newline at end of file
+    user: Mapped["User"] = relationship("User", back_populates="user_stats")
+
+# ===================== #
+#  SENT NOTIFICATIONS MODEL
+# ===================== #
+class SentNotification(Base):
+    """Ledger of scheduled notifications, one row per user, notification and day."""
+    __tablename__ = "sent_notifications"
+    
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Template name, plus the subject where one user can get several a day (e.g. "task_overdue:42")
+    notification_key: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket_date: Mapped[Date] = mapped_column(Date, primary_key=True)
+    
+    sent_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -97,7 +97,7 @@ def get_journaling_streaks(
         
         # TODO: Implement proper streak calculation
         # For now, return basic stats
-        journal_dates = set([datetime.fromisoformat(str(j.created_at)).date() for j in journals if j.created_at])
+        journal_dates = {j.created_at.date() for j in journals if j.created_at}
         
         return {
             "current_streak": 0,  # TODO: Calculate
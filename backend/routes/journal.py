@@ -3,7 +3,7 @@ Journal Routes - Journal Entry Management
 Handles CRUD operations for journal entries with XP rewards
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -97,7 +97,7 @@ async def get_user_journals(
         journals = crud.get_journals(db, user_id, skip, limit)
         logger.info(f"Retrieved {len(journals)} journal entries for user {user_id}")
         
-        return journals
+        return Response(content=schemas.dump_journals(journals), media_type="application/json")
     
     except HTTPException:
         raise
@@ -2,7 +2,7 @@
 Task Routes
 Handles task CRUD operations and task completion/tracking
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 import crud, schemas
@@ -69,7 +69,7 @@ def get_user_tasks(
     """
     try:
         tasks = crud.get_tasks(db, user_id, skip=skip, limit=limit)
-        return tasks
+        return Response(content=schemas.dump_tasks(tasks), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching tasks: {str(e)}")
         raise HTTPException(
@@ -88,7 +88,7 @@ def get_completed_tasks(
     """
     try:
         tasks = crud.get_completed_tasks(db, user_id)
-        return tasks
+        return Response(content=schemas.dump_tasks(tasks), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching completed tasks: {str(e)}")
         raise HTTPException(
@@ -107,7 +107,7 @@ def get_pending_tasks(
     """
     try:
         tasks = crud.get_pending_tasks(db, user_id)
-        return tasks
+        return Response(content=schemas.dump_tasks(tasks), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching pending tasks: {str(e)}")
         raise HTTPException(
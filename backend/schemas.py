@@ -1,6 +1,17 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, StringConstraints, TypeAdapter
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
+
+# Syntax-only email check, compiled once into pydantic-core's regex engine
+# instead of calling out to email-validator on every validation
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
+
+# ===================== #
+#  SHARED BASE
+# ===================== #
+class _ResponseBase(BaseModel):
+    """Base for read-only response models: built from ORM objects, never mutated."""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # ===================== #
 #  JOURNAL SCHEMAS
@@ -19,14 +30,11 @@ class JournalUpdate(BaseModel):
     mood: Optional[str] = None
 
 
-class Journal(JournalBase):
+class Journal(JournalBase, _ResponseBase):
     id: int
     user_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True  # Updated for Pydantic v2
-
 # ===================== #
 #  TASK SCHEMAS
 # ===================== #
@@ -46,16 +54,13 @@ class TaskUpdate(BaseModel):
     due_date: Optional[datetime] = None
 
 
-class Task(TaskBase):
+class Task(TaskBase, _ResponseBase):
     id: int
     user_id: int
     is_completed: bool
     completed_at: Optional[datetime] = None  # Added completed_at field
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 # ===================== #
 #  USER STATS / XP SCHEMAS
 # ===================== #
@@ -63,19 +68,16 @@ class UserStatsBase(BaseModel):
     level: int
     total_xp: int
 
-class UserStats(UserStatsBase):
+class UserStats(UserStatsBase, _ResponseBase):
     id: int
     user_id: int
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class XPUpdate(BaseModel):
     xp_gained: int
 
-class LevelProgress(BaseModel):
+class LevelProgress(_ResponseBase):
     current_level: int
     total_xp: int
     progress_in_current_level: int
@@ -93,12 +95,9 @@ class CategoryBase(BaseModel):
 class CategoryCreate(CategoryBase):
     pass
 
-class Category(CategoryBase):
+class Category(CategoryBase, _ResponseBase):
     id: int
 
-    class Config:
-        from_attributes = True
-
 # ===================== #
 #  LEVEL SCHEMAS (per category)
 # ===================== #
@@ -109,19 +108,16 @@ class LevelBase(BaseModel):
 class LevelCreate(LevelBase):
     category_id: int
 
-class Level(LevelBase):
+class Level(LevelBase, _ResponseBase):
     id: int
     user_id: int
     category_id: int
     category: Category
 
-    class Config:
-        from_attributes = True
-
 # ===================== #
 #  AUTHENTICATION SCHEMAS
 # ===================== #
-class Token(BaseModel):
+class Token(_ResponseBase):
     access_token: str
     token_type: str
 
@@ -133,30 +129,27 @@ class TokenData(BaseModel):
 # ===================== #
 class UserBase(BaseModel):
     username: str
-    email: EmailStr
+    email: Email
 
 class UserCreate(UserBase):
     password: str
 
 class UserUpdate(BaseModel):
     username: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
 
-class User(UserBase):
+class User(UserBase, _ResponseBase):
     id: int
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class UserWithStats(User):
     user_stats: Optional[UserStats] = None
 
 # ===================== #
 #  ANALYTICS / INSIGHTS SCHEMAS
 # ===================== #
-class ActivityStats(BaseModel):
+class ActivityStats(_ResponseBase):
     total_journals: int
     total_tasks: int
     completed_tasks: int
@@ -164,19 +157,19 @@ class ActivityStats(BaseModel):
     current_level: int
     total_xp: int
 
-class RecentActivity(BaseModel):
+class RecentActivity(_ResponseBase):
     journals: list[Journal]
     completed_tasks: list[Task]
     period_days: int
 
-class InsightsSummary(BaseModel):
+class InsightsSummary(_ResponseBase):
     total_journal_entries: int
     total_tasks: int
     completed_tasks: int
     completion_rate: float
     message: str
 
-class Streaks(BaseModel):
+class Streaks(_ResponseBase):
     journal_streak: int
     task_completion_streak: int
     message: str
@@ -184,15 +177,31 @@ class Streaks(BaseModel):
 # ===================== #
 #  RESPONSE SCHEMAS
 # ===================== #
-class MessageResponse(BaseModel):
+class MessageResponse(_ResponseBase):
     message: str
     detail: Optional[str] = None
 
-class HealthCheck(BaseModel):
+class HealthCheck(_ResponseBase):
     status: str
     service: str
     timestamp: datetime
 
-class VersionInfo(BaseModel):
+class VersionInfo(_ResponseBase):
     version: str
-    app: str
\ No newline at end of file
+    app: str
+
+# ===================== #
+#  LIST SERIALIZERS
+# ===================== #
+# Built once so list endpoints can validate and dump ORM rows straight to
+# JSON bytes through pydantic-core, skipping FastAPI's per-item handling.
+_JOURNAL_LIST = TypeAdapter(list[Journal])
+_TASK_LIST = TypeAdapter(list[Task])
+
+def dump_journals(rows) -> bytes:
+    """Serialize ORM journal rows to a JSON array"""
+    return _JOURNAL_LIST.dump_json(_JOURNAL_LIST.validate_python(rows, from_attributes=True))
+
+def dump_tasks(rows) -> bytes:
+    """Serialize ORM task rows to a JSON array"""
+    return _TASK_LIST.dump_json(_TASK_LIST.validate_python(rows, from_attributes=True))
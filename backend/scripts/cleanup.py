@@ -6,9 +6,14 @@ Run this periodically to maintain a clean development/production environment.
 
 import sys
 import os
-import glob
+import re
+import time
+import shutil
+import fnmatch
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 
 # Add parent directory to path to allow imports
@@ -22,6 +27,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Directories never descended into: VCS metadata, dependencies, tool caches, build output
+_SKIP_DIRS = frozenset({
+    ".git", "node_modules", ".venv", "venv", ".mypy_cache", ".pytest_cache", "dist", "build",
+})
+
+# Default temporary file patterns (*.tmp, *.cache, *.bak, *~) as one regex
+_TEMP_FILE_RE = re.compile(r".*\.(tmp|cache|bak)$|.*~$")
+
 
 def cleanup_log_files(directory: str = ".", older_than_days: int = 7):
     """
@@ -35,8 +48,11 @@ def cleanup_log_files(directory: str = ".", older_than_days: int = 7):
         logger.info(f"Searching for .log files in: {directory}")
         
         # Find all .log files
-        log_pattern = os.path.join(directory, "*.log")
-        log_files = glob.glob(log_pattern)
+        with os.scandir(directory) as entries:
+            log_files = [
+                entry for entry in entries
+                if entry.name.endswith(".log") and entry.is_file(follow_symlinks=False)
+            ]
         
         if not log_files:
             logger.info("No .log files found")
@@ -46,33 +62,34 @@ def cleanup_log_files(directory: str = ".", older_than_days: int = 7):
         
         deleted_count = 0
         skipped_count = 0
-        cutoff_date = datetime.now() - timedelta(days=older_than_days)
+        # Compare raw timestamps instead of building datetimes per file
+        cutoff_ts = time.time() - older_than_days * 86400
         
         for log_file in log_files:
             try:
                 # Get file modification time
-                file_mtime = datetime.fromtimestamp(os.path.getmtime(log_file))
+                file_stat = log_file.stat(follow_symlinks=False)
                 
-                if file_mtime < cutoff_date:
+                if file_stat.st_mtime < cutoff_ts:
                     # File is older than cutoff, delete it
-                    file_size = os.path.getsize(log_file)
-                    os.remove(log_file)
-                    logger.info(
-                        f"Deleted: {log_file} "
-                        f"(Size: {file_size / 1024:.2f} KB, "
-                        f"Modified: {file_mtime.strftime('%Y-%m-%d')})"
-                    )
+                    os.remove(log_file.path)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "Deleted: %s (Size: %.2f KB, Modified: %s)",
+                            log_file.path, file_stat.st_size / 1024,
+                            datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d')
+                        )
                     deleted_count += 1
                 else:
-                    logger.info(f"Skipped (recent): {log_file}")
+                    logger.debug("Skipped (recent): %s", log_file.path)
                     skipped_count += 1
                     
             except FileNotFoundError:
-                logger.warning(f"File not found (already deleted?): {log_file}")
+                logger.warning(f"File not found (already deleted?): {log_file.path}")
             except PermissionError:
-                logger.error(f"Permission denied: {log_file}")
+                logger.error(f"Permission denied: {log_file.path}")
             except Exception as e:
-                logger.error(f"Error processing {log_file}: {str(e)}")
+                logger.error(f"Error processing {log_file.path}: {str(e)}")
         
         logger.info(f"Cleanup complete: {deleted_count} deleted, {skipped_count} skipped")
         
@@ -80,6 +97,21 @@ def cleanup_log_files(directory: str = ".", older_than_days: int = 7):
         logger.error(f"Error during log cleanup: {str(e)}")
 
 
+def _find_pycache_dirs(path: str):
+    """Yield every __pycache__ directory below path, without descending into them."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name == "__pycache__":
+                yield entry.path
+            elif entry.name not in _SKIP_DIRS:
+                try:
+                    yield from _find_pycache_dirs(entry.path)
+                except OSError:
+                    pass
+
+
 def cleanup_pycache(root_directory: str = "."):
     """
     Remove __pycache__ directories recursively.
@@ -92,17 +124,14 @@ def cleanup_pycache(root_directory: str = "."):
         
         deleted_count = 0
         
-        for dirpath, dirnames, filenames in os.walk(root_directory):
-            if "__pycache__" in dirnames:
-                pycache_path = os.path.join(dirpath, "__pycache__")
-                try:
-                    # Remove directory and all contents
-                    import shutil
-                    shutil.rmtree(pycache_path)
-                    logger.info(f"Deleted: {pycache_path}")
-                    deleted_count += 1
-                except Exception as e:
-                    logger.error(f"Error deleting {pycache_path}: {str(e)}")
+        for pycache_path in _find_pycache_dirs(root_directory):
+            try:
+                # Remove directory and all contents
+                shutil.rmtree(pycache_path)
+                logger.debug("Deleted: %s", pycache_path)
+                deleted_count += 1
+            except Exception as e:
+                logger.error(f"Error deleting {pycache_path}: {str(e)}")
         
         if deleted_count > 0:
             logger.info(f"Removed {deleted_count} __pycache__ director(ies)")
@@ -113,33 +142,37 @@ def cleanup_pycache(root_directory: str = "."):
         logger.error(f"Error during __pycache__ cleanup: {str(e)}")
 
 
+@lru_cache(maxsize=32)
+def _compile_patterns(patterns: tuple) -> re.Pattern:
+    """Compile glob patterns into a single alternation regex."""
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
 def cleanup_temp_files(directory: str = ".", patterns: list = None):
     """
     Remove temporary files matching specific patterns.
     
     Args:
         directory: Directory to search (default: current directory)
-        patterns: List of file patterns to delete (default: ['.tmp', '.cache'])
+        patterns: List of file patterns to delete (default: ['*.tmp', '*.cache', '*.bak', '*~'])
     """
-    if patterns is None:
-        patterns = ["*.tmp", "*.cache", "*.bak", "*~"]
+    temp_re = _TEMP_FILE_RE if patterns is None else _compile_patterns(tuple(patterns))
     
     try:
         logger.info(f"Searching for temporary files in: {directory}")
         
         deleted_count = 0
         
-        for pattern in patterns:
-            file_pattern = os.path.join(directory, pattern)
-            temp_files = glob.glob(file_pattern)
-            
-            for temp_file in temp_files:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not temp_re.match(entry.name) or entry.is_dir(follow_symlinks=False):
+                    continue
                 try:
-                    os.remove(temp_file)
-                    logger.info(f"Deleted: {temp_file}")
+                    os.remove(entry.path)
+                    logger.debug("Deleted: %s", entry.path)
                     deleted_count += 1
                 except Exception as e:
-                    logger.error(f"Error deleting {temp_file}: {str(e)}")
+                    logger.error(f"Error deleting {entry.path}: {str(e)}")
         
         if deleted_count > 0:
             logger.info(f"Removed {deleted_count} temporary file(s)")
@@ -150,9 +183,24 @@ def cleanup_temp_files(directory: str = ".", patterns: list = None):
         logger.error(f"Error during temp file cleanup: {str(e)}")
 
 
+def _iter_file_sizes(path: str):
+    """Yield the size of every file below path, using the stat cached by scandir."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIP_DIRS:
+                        yield from _iter_file_sizes(entry.path)
+                else:
+                    yield entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+
+
 def get_directory_size(directory: str = "."):
     """
     Calculate total size of a directory.
+    Directories in _SKIP_DIRS (.git, node_modules, virtualenvs, ...) are not counted.
     
     Args:
         directory: Directory path
@@ -163,13 +211,7 @@ def get_directory_size(directory: str = "."):
     total_size = 0
     
     try:
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(filepath)
-                except (OSError, FileNotFoundError):
-                    pass
+        total_size = sum(_iter_file_sizes(directory))
     except Exception as e:
         logger.error(f"Error calculating directory size: {str(e)}")
     
@@ -185,9 +227,61 @@ def format_size(size_bytes: int) -> str:
     return f"{size_bytes:.2f} TB"
 
 
+def _visit(path: str, cutoff_ts: float, counts: Counter, top_level: bool = True):
+    """
+    Run every cleanup step in a single scandir pass over the tree.
+    
+    Removes __pycache__ directories anywhere below path (except inside
+    _SKIP_DIRS, which are never entered), and stale .log files
+    and temporary files in the top-level directory only (matching the
+    standalone cleanup functions). Sizes and results are accumulated in counts.
+    
+    Args:
+        path: Directory to visit
+        cutoff_ts: Log files modified before this timestamp are deleted
+        counts: Counter updated in place
+        top_level: Whether path is the directory cleanup was started from
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name == "__pycache__":
+                        size = sum(_iter_file_sizes(entry.path))
+                        counts["bytes_scanned"] += size
+                        shutil.rmtree(entry.path)
+                        counts["bytes_freed"] += size
+                        counts["pycache_deleted"] += 1
+                    elif entry.name not in _SKIP_DIRS:
+                        _visit(entry.path, cutoff_ts, counts, top_level=False)
+                    continue
+                
+                stat = entry.stat(follow_symlinks=False)
+                counts["bytes_scanned"] += stat.st_size
+                
+                if not top_level:
+                    continue
+                
+                if entry.name.endswith(".log"):
+                    if stat.st_mtime < cutoff_ts:
+                        os.remove(entry.path)
+                        counts["bytes_freed"] += stat.st_size
+                        counts["logs_deleted"] += 1
+                    else:
+                        counts["logs_skipped"] += 1
+                elif _TEMP_FILE_RE.match(entry.name):
+                    os.remove(entry.path)
+                    counts["bytes_freed"] += stat.st_size
+                    counts["temp_deleted"] += 1
+                    
+            except OSError as e:
+                counts["errors"] += 1
+                logger.error(f"Error processing {entry.path}: {str(e)}")
+
+
 def cleanup_all(log_days: int = 7):
     """
-    Run all cleanup operations.
+    Run all cleanup operations in a single pass over the current directory.
     
     Args:
         log_days: Delete log files older than this many days
@@ -197,34 +291,27 @@ def cleanup_all(log_days: int = 7):
         logger.info("SEIKATSU CLEANUP SCRIPT")
         logger.info("=" * 60)
         
-        # Get initial directory size
-        initial_size = get_directory_size(".")
-        logger.info(f"Initial directory size: {format_size(initial_size)}")
-        logger.info("-" * 60)
-        
-        # Cleanup operations
-        logger.info("1. Cleaning up log files...")
-        cleanup_log_files(older_than_days=log_days)
-        logger.info("-" * 60)
-        
-        logger.info("2. Cleaning up __pycache__ directories...")
-        cleanup_pycache()
-        logger.info("-" * 60)
+        counts = Counter()
+        cutoff_ts = time.time() - log_days * 86400
+        _visit(".", cutoff_ts, counts)
         
-        logger.info("3. Cleaning up temporary files...")
-        cleanup_temp_files()
-        logger.info("-" * 60)
+        initial_size = counts["bytes_scanned"]
+        final_size = initial_size - counts["bytes_freed"]
         
-        # Get final directory size
-        final_size = get_directory_size(".")
-        freed_space = initial_size - final_size
+        logger.info(
+            f"Log files: {counts['logs_deleted']} deleted, {counts['logs_skipped']} skipped (recent)"
+        )
+        logger.info(f"__pycache__ directories removed: {counts['pycache_deleted']}")
+        logger.info(f"Temporary files removed: {counts['temp_deleted']}")
+        if counts["errors"]:
+            logger.warning(f"⚠️  {counts['errors']} entries could not be processed")
         
         logger.info("=" * 60)
         logger.info("CLEANUP SUMMARY")
         logger.info("=" * 60)
         logger.info(f"Initial size: {format_size(initial_size)}")
         logger.info(f"Final size: {format_size(final_size)}")
-        logger.info(f"Freed space: {format_size(freed_space)}")
+        logger.info(f"Freed space: {format_size(counts['bytes_freed'])}")
         logger.info("=" * 60)
         logger.info("✅ Cleanup operations completed")
         logger.info("=" * 60)
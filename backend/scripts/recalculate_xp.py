@@ -12,6 +12,7 @@ from pathlib import Path
 # Add parent directory to path to allow imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+from sqlalchemy import select, update
 from database import SessionLocal
 from models import User, UserStats, Level
 from services.xp_manager import calculate_level, get_xp_for_level
@@ -25,6 +26,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Rows fetched and written back per batch; progress is logged once per batch
+BATCH_SIZE = 1000
+
 
 def recalculate_user_xp(db, user_id: int):
     """
@@ -74,9 +78,51 @@ def recalculate_user_xp(db, user_id: int):
         return False
 
 
+def _recalculate_levels(db, model, xp_column) -> tuple[int, int]:
+    """
+    Recompute the stored level of every row of a levelled model in bulk.
+    
+    Streams (id, level, xp) with a server-side cursor in batches of BATCH_SIZE,
+    computes the new levels in Python and writes only the changed rows of each
+    batch back with one executemany UPDATE. Nothing is committed here.
+    
+    Args:
+        db: Database session
+        model: Mapped class with ``id`` and ``level`` columns (UserStats or Level)
+        xp_column: Column holding the XP the level is derived from
+        
+    Returns:
+        Tuple of (rows_processed, rows_updated)
+    """
+    result = db.execute(
+        select(model.id, model.level, xp_column).execution_options(yield_per=BATCH_SIZE)
+    )
+    
+    processed = 0
+    updated = 0
+    for batch in result.partitions():
+        changes = []
+        for row_id, old_level, xp in batch:
+            new_level = calculate_level(xp)
+            if new_level != old_level:
+                changes.append({"id": row_id, "level": new_level})
+        
+        if changes:
+            db.execute(update(model), changes)
+        
+        processed += len(batch)
+        updated += len(changes)
+        logger.info(f"{model.__name__}: processed {processed} rows")
+    
+    return processed, updated
+
+
 def recalculate_all_users():
     """
     Recalculate XP and levels for all users in the database.
+    
+    Overall and per-category levels are rewritten with bulk UPDATEs and
+    committed once, in a single transaction.
     """
     db = SessionLocal()
     
@@ -85,42 +131,25 @@ def recalculate_all_users():
         logger.info("SEIKATSU XP RECALCULATION")
         logger.info("=" * 60)
         
-        # Get all users
-        users = db.query(User).all()
-        total_users = len(users)
+        stats_total, stats_updated = _recalculate_levels(db, UserStats, UserStats.total_xp)
         
-        if total_users == 0:
-            logger.warning("No users found in database")
+        if stats_total == 0:
+            logger.warning("No user stats found in database")
             return
         
-        logger.info(f"Found {total_users} users to process")
-        logger.info("-" * 60)
+        levels_total, levels_updated = _recalculate_levels(db, Level, Level.xp)
         
-        success_count = 0
-        error_count = 0
-        
-        # Process each user
-        for idx, user in enumerate(users, 1):
-            logger.info(f"Processing user {idx}/{total_users}: {user.username} (ID: {user.id})")
-            
-            if recalculate_user_xp(db, user.id):
-                success_count += 1
-            else:
-                error_count += 1
+        db.commit()
         
         # Summary
         logger.info("=" * 60)
         logger.info("RECALCULATION SUMMARY")
         logger.info("=" * 60)
-        logger.info(f"Total Users: {total_users}")
-        logger.info(f"Successfully Recalculated: {success_count}")
-        logger.info(f"Errors: {error_count}")
-        
-        if error_count == 0:
-            logger.info("✅ All users recalculated successfully!")
-        else:
-            logger.warning(f"⚠️  Completed with {error_count} errors")
-        
+        logger.info(f"User Stats Processed: {stats_total}")
+        logger.info(f"Overall Levels Updated: {stats_updated}")
+        logger.info(f"Category Levels Processed: {levels_total}")
+        logger.info(f"Category Levels Updated: {levels_updated}")
+        logger.info("✅ All users recalculated successfully!")
         logger.info("=" * 60)
         
     except Exception as e:
@@ -6,12 +6,15 @@ WARNING: This is a destructive operation. Use with caution.
 
 import sys
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path to allow imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+from sqlalchemy import func, select
 from database import SessionLocal
 from models import User
+from services.insights import calculate_streaks
 import logging
 
 # Configure logging
@@ -22,6 +25,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent streak calculations; keep below the engine's pool_size
+MAX_WORKERS = 16
+USER_BATCH_SIZE = 1000
+
 
 def reset_all_streaks():
     """
@@ -41,9 +48,8 @@ def reset_all_streaks():
         logger.info("SEIKATSU STREAK RESET")
         logger.info("=" * 60)
         
-        # Get all users
-        users = db.query(User).all()
-        total_users = len(users)
+        # Count users without loading them
+        total_users = db.query(func.count(User.id)).scalar()
         
         if total_users == 0:
             logger.warning("No users found in database")
@@ -91,37 +97,62 @@ def confirm_reset():
     return response == "yes"
 
 
+def _calculate_user_streaks(user_id: int):
+    """
+    Calculate streaks for one user in its own session (sessions are not thread-safe).
+    
+    Returns:
+        Streaks schema, or None if the calculation failed
+    """
+    db = SessionLocal()
+    try:
+        return calculate_streaks(db, user_id)
+    except Exception as e:
+        logger.error(f"Error calculating streaks for user {user_id}: {str(e)}")
+        return None
+    finally:
+        db.close()
+
+
 def display_current_streaks():
     """
     Display current streak information for all users.
     Helpful for verification before/after reset operations.
+    
+    Streaks are calculated concurrently in a thread pool, one batch of
+    users at a time, since each calculation is dominated by DB round trips.
     """
     db = SessionLocal()
     
     try:
-        from services.insights import calculate_streaks
-        
         logger.info("=" * 60)
         logger.info("CURRENT STREAK STATUS")
         logger.info("=" * 60)
         
-        users = db.query(User).all()
+        # Stream only the columns we print instead of loading every User
+        users = db.execute(
+            select(User.id, User.username).execution_options(yield_per=USER_BATCH_SIZE)
+        )
+        
+        user_count = 0
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for batch in users.partitions():
+                user_count += len(batch)
+                results = executor.map(_calculate_user_streaks, [user_id for user_id, _ in batch])
+                
+                for (user_id, username), streaks in zip(batch, results):
+                    if streaks is None:
+                        continue
+                    logger.info(
+                        f"User: {username} (ID: {user_id}) | "
+                        f"Journal Streak: {streaks.journal_streak} days | "
+                        f"Task Streak: {streaks.task_completion_streak} days"
+                    )
         
-        if not users:
+        if user_count == 0:
             logger.info("No users found")
             return
         
-        for user in users:
-            try:
-                streaks = calculate_streaks(db, user.id)
-                logger.info(
-                    f"User: {user.username} (ID: {user.id}) | "
-                    f"Journal Streak: {streaks.journal_streak} days | "
-                    f"Task Streak: {streaks.task_completion_streak} days"
-                )
-            except Exception as e:
-                logger.error(f"Error calculating streaks for user {user.id}: {str(e)}")
-        
         logger.info("=" * 60)
         
     except Exception as e:
@@ -10,9 +10,10 @@ from pathlib import Path
 # Add parent directory to path to allow imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from database import SessionLocal
 from models import Category, User, UserStats
-from config import DEFAULT_CATEGORIES
+from config import DEFAULT_CATEGORY_NAMES
 from crud import get_password_hash
 import logging
 
@@ -35,30 +36,22 @@ def seed_categories():
     try:
         logger.info("Starting category seeding...")
         
-        # Check if categories already exist
-        existing_count = db.query(Category).count()
+        # Single INSERT ... ON CONFLICT DO NOTHING; the unique index on
+        # Category.name makes the seed idempotent without per-row lookups
+        stmt = pg_insert(Category).values(
+            [{"name": name} for name in DEFAULT_CATEGORY_NAMES]
+        ).on_conflict_do_nothing(index_elements=["name"]).returning(Category.name)
         
-        if existing_count > 0:
-            logger.info(f"Categories already exist ({existing_count} found). Skipping seed.")
-            return
+        added = db.execute(stmt).scalars().all()
+        db.commit()
         
-        # Add each default category
-        added_count = 0
-        for cat_data in DEFAULT_CATEGORIES:
-            # Double-check individual category doesn't exist
-            existing = db.query(Category).filter(
-                Category.name == cat_data["name"]
-            ).first()
-            
-            if not existing:
-                category = Category(name=cat_data["name"])
-                db.add(category)
-                added_count += 1
-                logger.info(f"Added category: {cat_data['name']}")
+        for name in added:
+            logger.info(f"Added category: {name}")
         
-        # Commit all categories at once
-        db.commit()
-        logger.info(f"✅ Successfully seeded {added_count} categories!")
+        if added:
+            logger.info(f"✅ Successfully seeded {len(added)} categories!")
+        else:
+            logger.info("Categories already exist. Nothing to seed.")
         
     except Exception as e:
         db.rollback()
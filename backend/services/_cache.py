@@ -0,0 +1,148 @@
+"""
+Per-user TTL Cache
+Process-local cache for read-heavy, per-user insight results.
+Entries expire after a short TTL and are dropped early when the user's data changes.
+Also provides BoundedTTLMap, a plain size-bounded TTL map for other services.
+"""
+
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Seconds a cached result stays valid
+DEFAULT_TTL = 120
+
+# Maximum number of users with cached results (oldest user evicted first)
+DEFAULT_MAXSIZE = 10_000
+
+_MISSING = object()
+
+
+class UserTTLCache:
+    """
+    Results cached per user so a write can invalidate all of them at once.
+    
+    Each invalidation bumps a generation. A result computed while the user's
+    data was being changed is not stored, because its generation is stale.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: Dict[int, Dict[Hashable, Tuple[float, Any]]] = {}
+        # Per-user invalidation counts, plus one epoch for clear()
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def generation(self, user_id: int) -> Tuple[int, int]:
+        """Return the user's current generation; read it before computing a result to set()."""
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def get(self, user_id: int, key: Hashable) -> Any:
+        """Return the cached value, or _MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return _MISSING
+        return entry[1]
+
+    def set(self, user_id: int, key: Hashable, value: Any, generation: Tuple[int, int]) -> None:
+        """Cache value for user_id under key, unless the user was invalidated since generation."""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if generation != (self._epoch, self._generations.get(user_id, 0)):
+                return
+            user_entries = self._entries.get(user_id)
+            if user_entries is None:
+                if len(self._entries) >= self.maxsize:
+                    # Dicts keep insertion order: drop the oldest user
+                    del self._entries[next(iter(self._entries))]
+                user_entries = self._entries[user_id] = {}
+            user_entries[key] = (expires, value)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached result for a user."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if len(self._generations) >= self.maxsize and user_id not in self._generations:
+                # Forgetting the counts would let a stale result through, so
+                # move every user to a new epoch instead
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+
+class BoundedTTLMap:
+    """Thread-safe map whose entries expire, holding at most maxsize keys (oldest evicted first)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for key, or default if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds."""
+        expires = time.monotonic() + ttl
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                # Dicts keep insertion order: drop the oldest key
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (expires, value)
+
+    def pop(self, key: Hashable) -> None:
+        """Drop key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# Shared cache for the insights service
+insights_cache = UserTTLCache()
+
+# Streaks change at most once a day unless the user writes, which invalidates them,
+# so they can be kept much longer than the other insights
+streaks_cache = UserTTLCache(ttl=3600)
+
+
+def cached_per_user(cache: UserTTLCache) -> Callable:
+    """
+    Cache a function called as fn(db, user_id, ...) per user.
+    Cached results are shared between callers, so they must not be mutated.
+
+    Args:
+        cache: Cache to store results in
+
+    Returns:
+        Decorator
+    """
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(db, user_id: int, *args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            value = cache.get(user_id, key)
+            if value is _MISSING:
+                generation = cache.generation(user_id)
+                value = fn(db, user_id, *args, **kwargs)
+                cache.set(user_id, key, value, generation)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -1,115 +1,224 @@
 """
 Export Service
 Handles exporting user data to CSV, JSON, and PDF formats.
+
+Requires: pip install orjson
+Optional: pip install zstandard (compressed backups)
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from datetime import datetime
-from sqlalchemy import DateTime
-from typing import Optional, Dict
+from sqlalchemy import DateTime, Row, select, tuple_
+from typing import Optional, Dict, Iterable, Iterator, List
 import logging
 import csv
-import json
+import orjson
 from io import StringIO, BytesIO
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from models import Journal, Task, Level, UserStats, Category, User
+from services.insights import (
+    calculate_streaks,
+    get_activity_stats,
+    get_mood_trend,
+    generate_radar_data,
+    summarize_weekly_progress
+)
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per keyset page and written per yielded CSV chunk
+CSV_BATCH_SIZE = 1000
+
+# Constant CSV header lines, in csv.writer's default dialect (CRLF line endings)
+_JOURNAL_CSV_HEADER = "ID,Title,Content,Mood,Created At\r\n"
+_TASK_CSV_HEADER = (
+    "ID,Title,Description,Is Completed,Completed At,Due Date,XP Reward,Created At\r\n"
+)
+
+# Records fetched per keyset page / cursor batch when exporting JSON
+JSON_BATCH_SIZE = 500
+
+# Columns read by the exporters; selecting them directly returns lightweight
+# rows instead of identity-mapped ORM instances
+_JOURNAL_COLUMNS = (Journal.id, Journal.title, Journal.content, Journal.mood, Journal.created_at)
+_TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.is_completed,
+    Task.completed_at, Task.due_date, Task.xp_reward, Task.created_at,
+)
+
+# zstd level for compressed backups; JSON and CSV compress well even at low levels
+ZSTD_LEVEL = 3
+
+# One worker per create_backup sub-export
+BACKUP_WORKERS = 4
+
+# Pretty-printed output; naive datetimes are stored in UTC
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC
+
+
+def _drain(buffer: StringIO) -> str:
+    """Return the buffered CSV text and reset the buffer for reuse."""
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return chunk
+
+
+def _iter_pages(db: Session, model, columns, user_id: int, page_size: int) -> Iterator[List[Row]]:
+    """
+    Yield a user's rows in (created_at, id) order, one page at a time.
+    Uses keyset pagination on the (user_id, created_at, id) index, so each
+    page is an index range scan rather than a sort over every row.
+    
+    Args:
+        db: Database session
+        model: Journal or Task
+        columns: Columns to select; must include created_at and id
+        user_id: User ID
+        page_size: Rows per page
+        
+    Yields:
+        Lists of rows
+    """
+    stmt = select(*columns).where(
+        model.user_id == user_id
+    ).order_by(model.created_at, model.id).limit(page_size)
+    page_stmt = stmt
+    
+    while True:
+        rows = db.execute(page_stmt).all()
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+        page_stmt = stmt.where(
+            tuple_(model.created_at, model.id) > tuple_(last.created_at, last.id)
+        )
+
 
-def export_journals_to_csv(db: Session, user_id: int) -> str:
+def export_journals_to_csv(db: Session, user_id: int) -> Iterator[str]:
     """
     Export user's journals to CSV format.
+    Rows are streamed from the database and yielded in chunks, so the
+    result can be passed straight to a StreamingResponse.
     
     Args:
         db: Database session
         user_id: User ID
         
-    Returns:
-        CSV content as string
+    Yields:
+        Chunks of CSV content
     """
     try:
-        journals = db.query(Journal).filter(
-            Journal.user_id == user_id
-        ).order_by(Journal.created_at).all()
-        
         output = StringIO()
         writer = csv.writer(output)
         
-        # Write header
-        writer.writerow(['ID', 'Title', 'Content', 'Mood', 'Created At'])
-        
-        # Write data
-        for journal in journals:
-            writer.writerow([
-                journal.id,
-                journal.title,
-                journal.content,
-                journal.mood or '',
-                str(journal.created_at) if journal.created_at else ''
-            ])
+        yield _JOURNAL_CSV_HEADER
+        
+        # Write data, one page per chunk
+        count = 0
+        for journals in _iter_pages(db, Journal, _JOURNAL_COLUMNS, user_id, CSV_BATCH_SIZE):
+            writer.writerows(
+                (
+                    j.id,
+                    j.title,
+                    j.content,
+                    j.mood or '',
+                    j.created_at.isoformat() if j.created_at else ''
+                )
+                for j in journals
+            )
+            count += len(journals)
+            yield _drain(output)
         
-        csv_content = output.getvalue()
         output.close()
         
-        logger.info(f"Exported {len(journals)} journals to CSV for user {user_id}")
-        
-        return csv_content
+        logger.info(f"Exported {count} journals to CSV for user {user_id}")
         
     except Exception as e:
         logger.error(f"Error exporting journals to CSV for user {user_id}: {str(e)}")
         raise
 
 
-def export_tasks_to_csv(db: Session, user_id: int) -> str:
+def export_tasks_to_csv(db: Session, user_id: int) -> Iterator[str]:
     """
     Export user's tasks to CSV format.
+    Rows are streamed from the database and yielded in chunks, so the
+    result can be passed straight to a StreamingResponse.
     
     Args:
         db: Database session
         user_id: User ID
         
-    Returns:
-        CSV content as string
+    Yields:
+        Chunks of CSV content
     """
     try:
-        tasks = db.query(Task).filter(
-            Task.user_id == user_id
-        ).order_by(Task.created_at).all()
-        
         output = StringIO()
         writer = csv.writer(output)
         
-        # Write header
-        writer.writerow([
-            'ID', 'Title', 'Description', 'Is Completed',
-            'Completed At', 'Due Date', 'XP Reward', 'Created At'
-        ])
-        
-        # Write data
-        for task in tasks:
-            writer.writerow([
-                task.id,
-                task.title,
-                task.description or '',
-                'Yes' if task.is_completed else 'No',
-                str(task.completed_at) if task.completed_at else '',
-                str(task.due_date) if task.due_date else '',
-                task.xp_reward,
-                str(task.created_at) if task.created_at else ''
-            ])
-        
-        csv_content = output.getvalue()
-        output.close()
+        yield _TASK_CSV_HEADER
+        
+        # Write data, one page per chunk
+        count = 0
+        for tasks in _iter_pages(db, Task, _TASK_COLUMNS, user_id, CSV_BATCH_SIZE):
+            writer.writerows(
+                (
+                    t.id,
+                    t.title,
+                    t.description or '',
+                    'Yes' if t.is_completed else 'No',
+                    t.completed_at.isoformat() if t.completed_at else '',
+                    t.due_date.isoformat() if t.due_date else '',
+                    t.xp_reward,
+                    t.created_at.isoformat() if t.created_at else ''
+                )
+                for t in tasks
+            )
+            count += len(tasks)
+            yield _drain(output)
         
-        logger.info(f"Exported {len(tasks)} tasks to CSV for user {user_id}")
+        output.close()
         
-        return csv_content
+        logger.info(f"Exported {count} tasks to CSV for user {user_id}")
         
     except Exception as e:
         logger.error(f"Error exporting tasks to CSV for user {user_id}: {str(e)}")
         raise
 
 
+def _user_to_dict(user: User) -> Dict:
+    """Build the export record for a user."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "created_at": user.created_at,
+    }
+
+
+def _stats_to_dict(user_stats: Optional[UserStats]) -> Optional[Dict]:
+    """Build the export record for a user's overall stats."""
+    if not user_stats:
+        return None
+    return {
+        "level": user_stats.level,
+        "total_xp": user_stats.total_xp,
+    }
+
+
+def _journal_to_dict(j: Row) -> Dict:
+    """Build the export record for a journal row selected with _JOURNAL_COLUMNS."""
+    return dict(j._mapping)
+
+
+def _task_to_dict(t: Row) -> Dict:
+    """Build the export record for a task row selected with _TASK_COLUMNS."""
+    return dict(t._mapping)
+
+
 def export_user_data_to_json(db: Session, user_id: int) -> str:
     """
     Export all user data to JSON format.
@@ -122,72 +231,50 @@ def export_user_data_to_json(db: Session, user_id: int) -> str:
         JSON content as string
     """
     try:
-        # Get user info
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        # Get user info and stats in one round-trip
+        row = db.query(User, UserStats).outerjoin(
+            UserStats, UserStats.user_id == User.id
+        ).filter(User.id == user_id).first()
+        if not row:
             raise ValueError(f"User {user_id} not found")
-        
-        # Get user stats
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-        
-        # Get journals
-        journals = db.query(Journal).filter(Journal.user_id == user_id).all()
-        
-        # Get tasks
-        tasks = db.query(Task).filter(Task.user_id == user_id).all()
+        user, user_stats = row
+        
+        # Get journals and tasks through a server-side cursor, converting each
+        # batch to export records as it arrives instead of holding every row
+        journals = [
+            _journal_to_dict(j) for j in db.execute(
+                select(*_JOURNAL_COLUMNS).where(Journal.user_id == user_id)
+                .execution_options(stream_results=True, yield_per=JSON_BATCH_SIZE)
+            )
+        ]
+        
+        tasks = [
+            _task_to_dict(t) for t in db.execute(
+                select(*_TASK_COLUMNS).where(Task.user_id == user_id)
+                .execution_options(stream_results=True, yield_per=JSON_BATCH_SIZE)
+            )
+        ]
         
         # Get levels
-        levels = db.query(Level, Category).join(
+        levels = db.query(Category.name, Level.level, Level.xp).join(
             Category, Level.category_id == Category.id
         ).filter(Level.user_id == user_id).all()
         
         # Build export data
         export_data = {
             "export_date": datetime.utcnow().isoformat(),
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "created_at": str(user.created_at) if user.created_at else '',
-            },
-            "stats": {
-                "level": user_stats.level if user_stats else 1,
-                "total_xp": user_stats.total_xp if user_stats else 0,
-            } if user_stats else None,
-            "journals": [
-                {
-                    "id": j.id,
-                    "title": j.title,
-                    "content": j.content,
-                    "mood": j.mood,
-                    "created_at": str(j.created_at) if j.created_at else ''
-                }
-                for j in journals
-            ],
-            "tasks": [
-                {
-                    "id": t.id,
-                    "title": t.title,
-                    "description": t.description,
-                    "is_completed": t.is_completed,
-                    "completed_at": str(t.completed_at) if t.completed_at else None,
-                    "due_date": str(t.due_date) if t.due_date else None,
-                    "xp_reward": t.xp_reward,
-                    "created_at": str(t.created_at) if t.created_at else ''
-                }
-                for t in tasks
-            ],
+            "user": _user_to_dict(user),
+            "stats": _stats_to_dict(user_stats),
+            "journals": journals,
+            "tasks": tasks,
             "category_levels": [
-                {
-                    "category": category.name,
-                    "level": level.level,
-                    "xp": level.xp
-                }
-                for level, category in levels
+                {"category": name, "level": level, "xp": xp}
+                for name, level, xp in levels
             ]
         }
         
-        json_content = json.dumps(export_data, indent=2)
+        # orjson serializes datetimes natively (naive values are tagged as UTC)
+        json_content = orjson.dumps(export_data, option=_JSON_OPTIONS).decode()
         
         logger.info(f"Exported full user data to JSON for user {user_id}")
         
@@ -198,6 +285,71 @@ def export_user_data_to_json(db: Session, user_id: int) -> str:
         raise
 
 
+def _json_array(rows, to_dict) -> Iterator[bytes]:
+    """Yield the comma-separated JSON encoding of rows, one record at a time."""
+    separator = b""
+    for row in rows:
+        yield separator + orjson.dumps(to_dict(row), option=orjson.OPT_NAIVE_UTC)
+        separator = b","
+
+
+def export_user_data_to_json_stream(db: Session, user_id: int) -> Iterator[bytes]:
+    """
+    Export all user data as a stream of compact JSON chunks.
+    Journals and tasks are fetched in batches and encoded one record at a
+    time, so memory stays flat regardless of how much data the user has.
+    The result can be passed straight to a StreamingResponse.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        
+    Yields:
+        Chunks of JSON content as bytes
+    """
+    try:
+        row = db.query(User, UserStats).outerjoin(
+            UserStats, UserStats.user_id == User.id
+        ).filter(User.id == user_id).first()
+        if not row:
+            raise ValueError(f"User {user_id} not found")
+        user, user_stats = row
+        
+        yield (
+            b'{"export_date":' + orjson.dumps(datetime.utcnow())
+            + b',"user":' + orjson.dumps(_user_to_dict(user), option=orjson.OPT_NAIVE_UTC)
+            + b',"stats":' + orjson.dumps(_stats_to_dict(user_stats))
+            + b',"journals":['
+        )
+        
+        journals = chain.from_iterable(
+            _iter_pages(db, Journal, _JOURNAL_COLUMNS, user_id, JSON_BATCH_SIZE)
+        )
+        yield from _json_array(journals, _journal_to_dict)
+        
+        yield b'],"tasks":['
+        
+        tasks = chain.from_iterable(
+            _iter_pages(db, Task, _TASK_COLUMNS, user_id, JSON_BATCH_SIZE)
+        )
+        yield from _json_array(tasks, _task_to_dict)
+        
+        levels = db.query(Category.name, Level.level, Level.xp).join(
+            Category, Level.category_id == Category.id
+        ).filter(Level.user_id == user_id).all()
+        
+        yield b'],"category_levels":' + orjson.dumps([
+            {"category": name, "level": level, "xp": xp}
+            for name, level, xp in levels
+        ]) + b'}'
+        
+        logger.info(f"Streamed full user data as JSON for user {user_id}")
+        
+    except Exception as e:
+        logger.error(f"Error streaming user data as JSON for user {user_id}: {str(e)}")
+        raise
+
+
 def export_insights_report(db: Session, user_id: int) -> Dict:
     """
     Generate a comprehensive insights report for export.
@@ -210,23 +362,16 @@ def export_insights_report(db: Session, user_id: int) -> Dict:
         Dictionary with insights data ready for export
     """
     try:
-        from services.insights import (
-            calculate_streaks,
-            get_activity_stats,
-            get_mood_trend,
-            generate_radar_data,
-            summarize_weekly_progress
-        )
-        
-        # Gather all insights
-        streaks = calculate_streaks(db, user_id)
+        # Gather all insights against one reference time so day boundaries agree
+        now = datetime.utcnow()
+        streaks = calculate_streaks(db, user_id, now=now)
         activity_stats = get_activity_stats(db, user_id)
-        mood_trend = get_mood_trend(db, user_id, days=30)
+        mood_trend = get_mood_trend(db, user_id, days=30, now=now)
         radar_data = generate_radar_data(db, user_id)
-        weekly_progress = summarize_weekly_progress(db, user_id)
+        weekly_progress = summarize_weekly_progress(db, user_id, now=now)
         
         report = {
-            "generated_at": datetime.utcnow().isoformat(),
+            "generated_at": now.isoformat(),
             "user_id": user_id,
             "streaks": {
                 "journal_streak": streaks.journal_streak,
@@ -255,47 +400,127 @@ def export_insights_report(db: Session, user_id: int) -> Dict:
         raise
 
 
-def export_insights_to_json(db: Session, user_id: int) -> str:
+def export_insights_to_json(db: Session, user_id: int) -> bytes:
     """
-    Export insights report as JSON string.
+    Export insights report as UTF-8 encoded JSON.
     
     Args:
         db: Database session
         user_id: User ID
         
     Returns:
-        JSON string with insights report
+        JSON bytes with insights report, ready to send as a response body
     """
     try:
         report = export_insights_report(db, user_id)
-        return json.dumps(report, indent=2)
+        return orjson.dumps(report, option=_JSON_OPTIONS)
         
     except Exception as e:
         logger.error(f"Error exporting insights to JSON for user {user_id}: {str(e)}")
         raise
 
 
-def create_backup(db: Session, user_id: int) -> Dict:
+def _run_in_session(session_factory, export_fn, user_id: int):
+    """Run one export in its own session; Sessions are not thread-safe."""
+    db = session_factory()
+    try:
+        return export_fn(db, user_id)
+    finally:
+        db.close()
+
+
+def _journals_csv(db: Session, user_id: int) -> str:
+    """Collect the streamed journals CSV into a single string."""
+    return "".join(export_journals_to_csv(db, user_id))
+
+
+def _tasks_csv(db: Session, user_id: int) -> str:
+    """Collect the streamed tasks CSV into a single string."""
+    return "".join(export_tasks_to_csv(db, user_id))
+
+
+def compress_stream(chunks: Iterable, level: int = ZSTD_LEVEL) -> Iterator[bytes]:
+    """
+    Compress an export (a str, or a stream of str/bytes chunks) with zstd.
+    Requires: pip install zstandard
+    
+    Args:
+        chunks: Export output, e.g. from export_journals_to_csv
+        level: zstd compression level (default: ZSTD_LEVEL)
+        
+    Yields:
+        Chunks of zstd-compressed bytes
+    """
+    try:
+        import zstandard as zstd  # type: ignore
+    except ImportError:
+        logger.warning(
+            "zstandard not installed. "
+            "Install with: pip install zstandard"
+        )
+        raise
+    
+    if isinstance(chunks, (str, bytes)):
+        chunks = (chunks,)
+    
+    compressor = zstd.ZstdCompressor(level=level, threads=-1).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _compressed(export_fn):
+    """Wrap an export function so it returns zstd-compressed bytes."""
+    def run(db: Session, user_id: int) -> bytes:
+        return b"".join(compress_stream(export_fn(db, user_id)))
+    return run
+
+
+def create_backup(db: Session, user_id: int, compress: bool = False) -> Dict:
     """
     Create a complete backup of all user data.
+    The sub-exports run concurrently, each on its own session bound to
+    the same engine as db.
     
     Args:
         db: Database session
         user_id: User ID
+        compress: Return the JSON and CSV exports as zstd-compressed bytes
         
     Returns:
         Dictionary with all export formats
     """
     try:
+        session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+        if compress:
+            parts = {
+                "json": _compressed(export_user_data_to_json),
+                "journals_csv": _compressed(export_journals_to_csv),
+                "tasks_csv": _compressed(export_tasks_to_csv),
+                "insights": export_insights_report,
+            }
+        else:
+            parts = {
+                "json": export_user_data_to_json,
+                "journals_csv": _journals_csv,
+                "tasks_csv": _tasks_csv,
+                "insights": export_insights_report,
+            }
+        
+        with ThreadPoolExecutor(max_workers=BACKUP_WORKERS) as executor:
+            futures = {
+                key: executor.submit(_run_in_session, session_factory, export_fn, user_id)
+                for key, export_fn in parts.items()
+            }
+            data = {key: future.result() for key, future in futures.items()}
+        
         backup = {
             "created_at": datetime.utcnow().isoformat(),
             "user_id": user_id,
-            "data": {
-                "json": export_user_data_to_json(db, user_id),
-                "journals_csv": export_journals_to_csv(db, user_id),
-                "tasks_csv": export_tasks_to_csv(db, user_id),
-                "insights": export_insights_report(db, user_id)
-            }
+            "compression": "zstd" if compress else None,
+            "data": data
         }
         
         logger.info(f"Created complete backup for user {user_id}")
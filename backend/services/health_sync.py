@@ -6,14 +6,16 @@ Syncs activity data and rewards XP for workouts.
 
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+from types import MappingProxyType
+from enum import IntEnum
 import logging
-from services.xp_manager import add_xp
+from services.xp_manager import add_xp_bulk
 
 logger = logging.getLogger(__name__)
 
-# XP rewards for different activity types
-ACTIVITY_XP_REWARDS = {
+# XP rewards for different activity types (read-only)
+ACTIVITY_XP_REWARDS = MappingProxyType({
     "walking": 5,      # per 1000 steps
     "running": 15,     # per km
     "cycling": 10,     # per km
@@ -22,8 +24,52 @@ ACTIVITY_XP_REWARDS = {
     "yoga": 25,        # per session
     "meditation": 20,  # per session
     "sleep": 10,       # for good sleep (7-9 hours)
+})
+
+# Amount divisor for distance/step based activities; session-based ones award a flat reward
+_ACTIVITY_DIVISORS = {
+    "walking": 1000,   # steps
+    "running": 1,      # km
+    "cycling": 1,      # km
+    "swimming": 100,   # metres
 }
 
+
+class ActivityType(IntEnum):
+    """Known activity types; parse incoming strings with parse_activity_type."""
+    WALKING = 0
+    RUNNING = 1
+    CYCLING = 2
+    SWIMMING = 3
+    WORKOUT = 4
+    YOGA = 5
+    MEDITATION = 6
+    SLEEP = 7
+
+
+# Lowercase activity name -> ActivityType, used once per activity at ingest
+_ACTIVITY_TYPES = MappingProxyType({activity.name.lower(): activity for activity in ActivityType})
+
+# (divisor or None for session-based, XP multiplier), indexed by ActivityType
+_ACTIVITY_RULES = tuple(
+    (_ACTIVITY_DIVISORS.get(activity.name.lower()), ACTIVITY_XP_REWARDS[activity.name.lower()])
+    for activity in ActivityType
+)
+_DEFAULT_ACTIVITY_RULE = (None, 5)
+
+
+def parse_activity_type(activity_type: str) -> Optional[ActivityType]:
+    """
+    Map an activity name from a health data source to an ActivityType.
+    
+    Args:
+        activity_type: Activity name, case-insensitive (walking, running, etc.)
+        
+    Returns:
+        Matching ActivityType, or None for unknown activities
+    """
+    return _ACTIVITY_TYPES.get(activity_type.lower())
+
 # Fitness category ID (should match your Category table)
 FITNESS_CATEGORY_ID = 2  # Adjust based on your category setup
 
@@ -35,31 +81,36 @@ class HealthSyncService:
         self.google_fit_api = None  # Would be initialized with credentials
         self.apple_health_api = None  # Would be initialized with credentials
     
-    def calculate_activity_xp(self, activity_type: str, amount: float) -> int:
+    def calculate_activity_xp(
+        self,
+        activity_type: Union[ActivityType, str, None],
+        amount: float
+    ) -> int:
         """
         Calculate XP for a given activity.
         
         Args:
-            activity_type: Type of activity (walking, running, etc.)
+            activity_type: ActivityType, or an activity name (walking, running, etc.)
+                which is parsed with parse_activity_type. Unknown activities earn
+                the default session reward.
             amount: Amount of activity (steps, km, etc.)
             
         Returns:
             XP to award
         """
-        base_xp = ACTIVITY_XP_REWARDS.get(activity_type.lower(), 5)
-        
-        if activity_type.lower() == "walking":
-            # XP per 1000 steps
-            return int((amount / 1000) * base_xp)
-        elif activity_type.lower() in ["running", "cycling"]:
-            # XP per km
-            return int(amount * base_xp)
-        elif activity_type.lower() == "swimming":
-            # XP per 100m
-            return int((amount / 100) * base_xp)
+        if isinstance(activity_type, str):
+            activity_type = parse_activity_type(activity_type)
+        
+        if activity_type is None:
+            divisor, multiplier = _DEFAULT_ACTIVITY_RULE
         else:
-            # Session-based activities
-            return base_xp
+            divisor, multiplier = _ACTIVITY_RULES[activity_type]
+        
+        if divisor:
+            # XP per unit of distance/steps
+            return int(amount / divisor * multiplier)
+        # Session-based activities
+        return multiplier
 
 
 def sync_google_fit(
@@ -128,21 +179,20 @@ def sync_google_fit(
         
         total_xp = 0
         synced_activities = []
+        xp_entries = []
         
         service = HealthSyncService()
         
         for activity in activities:
-            xp = service.calculate_activity_xp(activity["type"], activity["amount"])
-            
-            # Award XP
-            xp_result = add_xp(
-                db=db,
-                user_id=user_id,
-                category_id=FITNESS_CATEGORY_ID,
-                amount=xp,
-                reason=f"Google Fit sync: {activity['type']} - {activity['amount']}"
+            xp = service.calculate_activity_xp(
+                parse_activity_type(activity["type"]), activity["amount"]
             )
             
+            xp_entries.append({
+                "amount": xp,
+                "reason": f"Google Fit sync: {activity['type']} - {activity['amount']}"
+            })
+            
             total_xp += xp
             synced_activities.append({
                 "type": activity["type"],
@@ -151,6 +201,10 @@ def sync_google_fit(
                 "date": activity["date"].isoformat()
             })
         
+        # Award all XP in one transaction
+        if xp_entries:
+            add_xp_bulk(db, user_id, FITNESS_CATEGORY_ID, xp_entries)
+        
         logger.info(
             f"Synced {len(activities)} activities from Google Fit for user {user_id}, "
             f"awarded {total_xp} XP"
@@ -210,18 +264,13 @@ def sync_apple_health(
         
         total_xp = 0
         synced_activities = []
+        xp_entries = []
         service = HealthSyncService()
         
         # Process steps
         if "steps" in health_data:
-            xp = service.calculate_activity_xp("walking", health_data["steps"])
-            xp_result = add_xp(
-                db=db,
-                user_id=user_id,
-                category_id=FITNESS_CATEGORY_ID,
-                amount=xp,
-                reason=f"Apple Health: {health_data['steps']} steps"
-            )
+            xp = service.calculate_activity_xp(ActivityType.WALKING, health_data["steps"])
+            xp_entries.append({"amount": xp, "reason": f"Apple Health: {health_data['steps']} steps"})
             total_xp += xp
             synced_activities.append({
                 "type": "steps",
@@ -235,14 +284,8 @@ def sync_apple_health(
                 workout_type = workout.get("type", "workout")
                 amount = workout.get("distance", 1)  # Default to 1 session if no distance
                 
-                xp = service.calculate_activity_xp(workout_type, amount)
-                xp_result = add_xp(
-                    db=db,
-                    user_id=user_id,
-                    category_id=FITNESS_CATEGORY_ID,
-                    amount=xp,
-                    reason=f"Apple Health: {workout_type} workout"
-                )
+                xp = service.calculate_activity_xp(parse_activity_type(workout_type), amount)
+                xp_entries.append({"amount": xp, "reason": f"Apple Health: {workout_type} workout"})
                 total_xp += xp
                 synced_activities.append({
                     "type": workout_type,
@@ -256,13 +299,7 @@ def sync_apple_health(
             # Reward good sleep (7-9 hours)
             if 7 <= duration <= 9:
                 xp = ACTIVITY_XP_REWARDS["sleep"]
-                xp_result = add_xp(
-                    db=db,
-                    user_id=user_id,
-                    category_id=FITNESS_CATEGORY_ID,
-                    amount=xp,
-                    reason=f"Apple Health: {duration}h quality sleep"
-                )
+                xp_entries.append({"amount": xp, "reason": f"Apple Health: {duration}h quality sleep"})
                 total_xp += xp
                 synced_activities.append({
                     "type": "sleep",
@@ -270,6 +307,10 @@ def sync_apple_health(
                     "xp_earned": xp
                 })
         
+        # Award all XP in one transaction
+        if xp_entries:
+            add_xp_bulk(db, user_id, FITNESS_CATEGORY_ID, xp_entries)
+        
         logger.info(
             f"Synced {len(synced_activities)} activities from Apple Health for user {user_id}, "
             f"awarded {total_xp} XP"
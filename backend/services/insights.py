@@ -3,114 +3,247 @@ Insights Service
 Generates analytics, streaks, mood trends, and activity summaries.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import (
+    Date, case, event, func, and_, desc, lambda_stmt, literal, null, select, union_all
+)
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Set, Tuple
 import logging
 from collections import Counter
 from models import Journal, Task, Level, UserStats, Category, User
 from schemas import ActivityStats, RecentActivity, InsightsSummary, Streaks
+from services._cache import insights_cache, streaks_cache, cached_per_user
 
 logger = logging.getLogger(__name__)
 
+# Streaks are only counted this many days back
+STREAK_MAX_DAYS = 365
 
-def calculate_streaks(db: Session, user_id: int) -> Streaks:
+# Moods (lowercase) counted as positive / negative in mood trend analysis
+POSITIVE_MOODS = ("happy", "great", "excited", "joyful", "content", "peaceful")
+NEGATIVE_MOODS = ("sad", "angry", "anxious", "stressed", "frustrated", "tired")
+
+# Columns serialized by the Journal / Task response schemas in RecentActivity;
+# selected as plain rows so no ORM instances (or lazy loads) are involved
+_RECENT_JOURNAL_COLUMNS = (
+    Journal.id, Journal.user_id, Journal.title, Journal.content, Journal.mood, Journal.created_at,
+)
+_RECENT_TASK_COLUMNS = (
+    Task.id, Task.user_id, Task.title, Task.description, Task.xp_reward, Task.due_date,
+    Task.is_completed, Task.completed_at, Task.created_at,
+)
+
+
+# Models whose changes can affect cached insights
+_CACHED_INSIGHT_MODELS = (Journal, Task, UserStats, Level)
+
+# Caches holding per-user insight results
+_INSIGHT_CACHES = (insights_cache, streaks_cache)
+
+
+# session.info key of the user IDs whose cached insights are dropped when the
+# session's transaction commits (None in the set means every user). Dropping
+# them at write time would let a concurrent reader cache pre-commit data again.
+_PENDING_INVALIDATIONS = "insights_pending_invalidations"
+
+
+def _pending_invalidations(session: Session) -> Set[Optional[int]]:
+    """User IDs to invalidate when session's transaction commits."""
+    return session.info.setdefault(_PENDING_INVALIDATIONS, set())
+
+
+def _invalidate_user_insights(mapper, connection, target):
+    """Drop a user's cached insights once a write to one of their rows commits."""
+    session = object_session(target)
+    if session is not None:
+        _pending_invalidations(session).add(target.user_id)
+
+
+for _model in _CACHED_INSIGHT_MODELS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _invalidate_user_insights)
+
+
+def _statement_user_ids(statement, table) -> Optional[Set[int]]:
+    """
+    Find the users a bulk UPDATE/DELETE is limited to by its WHERE clause.
+    
+    Args:
+        statement: UPDATE or DELETE statement
+        table: Table the statement writes to
+        
+    Returns:
+        Set of user IDs from a top-level "user_id = ?" or "user_id IN (...)"
+        condition, or None if the statement isn't limited to known users
+    """
+    where = statement.whereclause
+    if where is None:
+        return None
+    
+    # Only ANDed conditions restrict the rows; anything under an OR may not
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        clauses = where.clauses
+    else:
+        clauses = (where,)
+    
+    user_id_column = table.c.user_id
+    for clause in clauses:
+        if not (
+            isinstance(clause, BinaryExpression)
+            and isinstance(clause.right, BindParameter)
+            and clause.left.compare(user_id_column)
+        ):
+            continue
+        if clause.operator is operators.eq:
+            return {clause.right.effective_value}
+        if clause.operator is operators.in_op:
+            return set(clause.right.effective_value)
+    
+    return None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    """
+    Bulk UPDATE/DELETE statements skip per-row events: on commit, drop the cached
+    insights of the users they are filtered to, or of every user if there's no such filter.
+    """
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in _CACHED_INSIGHT_MODELS:
+        return
+    
+    user_ids = _statement_user_ids(orm_execute_state.statement, mapper.local_table)
+    _pending_invalidations(orm_execute_state.session).update(
+        user_ids if user_ids is not None else (None,)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_writes(session):
+    """Drop the cached insights of every user written in the committed transaction."""
+    if session.get_nested_transaction() is not None:
+        # A SAVEPOINT was released; the outer transaction hasn't committed yet
+        return
+    user_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if not user_ids:
+        return
+    for cache in _INSIGHT_CACHES:
+        if None in user_ids:
+            cache.clear()
+        else:
+            for user_id in user_ids:
+                cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_rolled_back_writes(session, transaction):
+    """Forget pending invalidations once the outermost transaction ends without a commit."""
+    if transaction.parent is None:
+        session.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+def calculate_streaks(db: Session, user_id: int, now: Optional[datetime] = None) -> Streaks:
     """
     Calculate journaling and task completion streaks for a user.
     
     Args:
         db: Database session
         user_id: User ID
+        now: Reference time (default: current UTC time)
         
     Returns:
         Streaks schema with current streak counts
     """
     try:
-        # Calculate journal streak
-        journal_streak = _calculate_journal_streak(db, user_id)
-        
-        # Calculate task completion streak
-        task_streak = _calculate_task_streak(db, user_id)
-        
-        # Generate motivational message
-        if journal_streak >= 7 and task_streak >= 7:
-            message = f"🔥 Amazing! {journal_streak} day journal streak and {task_streak} day task streak!"
-        elif journal_streak >= 7:
-            message = f"🔥 {journal_streak} day journal streak! Keep it up!"
-        elif task_streak >= 7:
-            message = f"🔥 {task_streak} day task completion streak! Keep going!"
-        elif journal_streak > 0 or task_streak > 0:
-            message = "Keep building your streaks! Consistency is key."
-        else:
-            message = "Start your streak today! Small steps lead to big changes."
-        
-        return Streaks(
-            journal_streak=journal_streak,
-            task_completion_streak=task_streak,
-            message=message
-        )
+        # Cached per user and day; writes to the user's journals/tasks invalidate it
+        return _calculate_streaks_for_day(db, user_id, (now or datetime.utcnow()).date())
         
     except Exception as e:
         logger.error(f"Error calculating streaks for user {user_id}: {str(e)}")
         raise
 
 
-def _calculate_journal_streak(db: Session, user_id: int) -> int:
-    """Calculate consecutive days with at least one journal entry."""
-    today = datetime.utcnow().date()
-    streak = 0
-    current_date = today
+@cached_per_user(streaks_cache)
+def _calculate_streaks_for_day(db: Session, user_id: int, today: date) -> Streaks:
+    """Calculate the streaks ending on today and build the Streaks response."""
+    # Calculate journal streak
+    journal_streak = _calculate_journal_streak(db, user_id, today)
     
-    while True:
-        # Check if user journaled on current_date
-        journal_count = db.query(Journal).filter(
-            Journal.user_id == user_id,
-            func.date(Journal.created_at) == current_date
-        ).count()
-        
-        if journal_count > 0:
-            streak += 1
-            current_date -= timedelta(days=1)
-        else:
-            # Streak broken
-            break
-        
-        # Prevent infinite loop - cap at 365 days
-        if streak >= 365:
-            break
+    # Calculate task completion streak
+    task_streak = _calculate_task_streak(db, user_id, today)
     
-    return streak
+    # Generate motivational message
+    if journal_streak >= 7 and task_streak >= 7:
+        message = f"🔥 Amazing! {journal_streak} day journal streak and {task_streak} day task streak!"
+    elif journal_streak >= 7:
+        message = f"🔥 {journal_streak} day journal streak! Keep it up!"
+    elif task_streak >= 7:
+        message = f"🔥 {task_streak} day task completion streak! Keep going!"
+    elif journal_streak > 0 or task_streak > 0:
+        message = "Keep building your streaks! Consistency is key."
+    else:
+        message = "Start your streak today! Small steps lead to big changes."
+    
+    return Streaks(
+        journal_streak=journal_streak,
+        task_completion_streak=task_streak,
+        message=message
+    )
+
 
+def _streak_window_start(today) -> datetime:
+    """Earliest timestamp that can still count towards a streak ending today."""
+    return datetime.combine(today - timedelta(days=STREAK_MAX_DAYS - 1), time.min)
 
-def _calculate_task_streak(db: Session, user_id: int) -> int:
-    """Calculate consecutive days with at least one completed task."""
-    today = datetime.utcnow().date()
+
+def _count_streak(active_days: Set[date], today: date) -> int:
+    """Count consecutive days in active_days ending today, capped at STREAK_MAX_DAYS."""
     streak = 0
     current_date = today
     
-    while True:
-        # Check if user completed tasks on current_date
-        task_count = db.query(Task).filter(
-            Task.user_id == user_id,
-            Task.is_completed == True,
-            func.date(Task.completed_at) == current_date
-        ).count()
-        
-        if task_count > 0:
-            streak += 1
-            current_date -= timedelta(days=1)
-        else:
-            # Streak broken
-            break
-        
-        # Prevent infinite loop - cap at 365 days
-        if streak >= 365:
-            break
+    while current_date in active_days and streak < STREAK_MAX_DAYS:
+        streak += 1
+        current_date -= timedelta(days=1)
     
     return streak
 
 
+def _calculate_journal_streak(db: Session, user_id: int, today: date) -> int:
+    """Calculate consecutive days up to today with at least one journal entry."""
+    window_start = _streak_window_start(today)
+    
+    # One query for every day with an entry in the streak window
+    rows = db.execute(lambda_stmt(lambda: select(
+        func.date(Journal.created_at, type_=Date)
+    ).where(
+        Journal.user_id == user_id,
+        Journal.created_at >= window_start
+    ).distinct())).all()
+    
+    return _count_streak({day for (day,) in rows}, today)
+
+
+def _calculate_task_streak(db: Session, user_id: int, today: date) -> int:
+    """Calculate consecutive days up to today with at least one completed task."""
+    window_start = _streak_window_start(today)
+    
+    # One query for every day with a completed task in the streak window
+    rows = db.execute(lambda_stmt(lambda: select(
+        func.date(Task.completed_at, type_=Date)
+    ).where(
+        Task.user_id == user_id,
+        Task.is_completed == True,
+        Task.completed_at >= window_start
+    ).distinct())).all()
+    
+    return _count_streak({day for (day,) in rows}, today)
+
+
 def generate_radar_data(db: Session, user_id: int) -> Dict:
     """
     Generate radar chart data showing XP/level distribution across categories.
@@ -123,31 +256,29 @@ def generate_radar_data(db: Session, user_id: int) -> Dict:
         Dictionary with category names and their corresponding XP/levels
     """
     try:
-        # Get all category levels for user
-        category_levels = db.query(Level, Category).join(
+        # Project only the needed columns instead of hydrating Level/Category objects
+        rows = db.query(Category.name, Level.level, Level.xp).join(
             Category, Level.category_id == Category.id
         ).filter(Level.user_id == user_id).all()
         
-        radar_data = {
-            "categories": [],
-            "levels": [],
-            "xp": [],
-            "normalized_scores": []  # Normalized to 0-100 scale for radar visualization
-        }
-        
-        if not category_levels:
-            return radar_data
+        if not rows:
+            return {
+                "categories": [],
+                "levels": [],
+                "xp": [],
+                "normalized_scores": []  # Normalized to 0-100 scale for radar visualization
+            }
         
-        # Find max level for normalization
-        max_level = max([level.level for level, _ in category_levels]) if category_levels else 1
+        names, levels, xp = (list(column) for column in zip(*rows))
         
-        for level, category in category_levels:
-            radar_data["categories"].append(category.name)
-            radar_data["levels"].append(level.level)
-            radar_data["xp"].append(level.xp)
-            # Normalize level to 0-100 scale
-            normalized = (level.level / max(max_level, 10)) * 100
-            radar_data["normalized_scores"].append(round(normalized, 2))
+        # Normalize levels to 0-100 scale against the highest level (at least 10)
+        denominator = max(max(levels), 10)
+        radar_data = {
+            "categories": names,
+            "levels": levels,
+            "xp": xp,
+            "normalized_scores": [round((level / denominator) * 100, 2) for level in levels]
+        }
         
         return radar_data
         
@@ -156,7 +287,12 @@ def generate_radar_data(db: Session, user_id: int) -> Dict:
         raise
 
 
-def get_mood_trend(db: Session, user_id: int, days: int = 30) -> Dict:
+def get_mood_trend(
+    db: Session,
+    user_id: int,
+    days: int = 30,
+    now: Optional[datetime] = None
+) -> Dict:
     """
     Analyze mood trends from journal entries over specified period.
     
@@ -164,21 +300,71 @@ def get_mood_trend(db: Session, user_id: int, days: int = 30) -> Dict:
         db: Database session
         user_id: User ID
         days: Number of days to analyze (default: 30)
+        now: Reference time (default: current UTC time)
         
     Returns:
         Dictionary with mood distribution and trend analysis
     """
     try:
         # Get journals from the last N days
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        journals = db.query(Journal).filter(
+        start_date = (now or datetime.utcnow()) - timedelta(days=days)
+        in_period = (
             Journal.user_id == user_id,
             Journal.created_at >= start_date,
             Journal.mood.isnot(None)
-        ).order_by(Journal.created_at).all()
+        )
+        
+        # Tag which half of the period each entry falls in, then count moods per
+        # half in the database instead of loading every journal. NTILE(2) over
+        # newest-first order puts the extra entry of an odd total in the newer
+        # bucket, so the first half is exactly the oldest total // 2 entries
+        newest_first = func.ntile(2).over(order_by=(desc(Journal.created_at), desc(Journal.id)))
+        half = 2 - newest_first
+        entries = select(Journal.mood, half.label("half")).where(*in_period).subquery()
+        
+        # Positive moods score +1 and negative moods -1, summed by the database
+        lowered = func.lower(entries.c.mood)
+        score = case(
+            (lowered.in_(POSITIVE_MOODS), 1),
+            (lowered.in_(NEGATIVE_MOODS), -1),
+            else_=0
+        )
+        
+        mood_aggregate = select(
+            literal("agg").label("kind"),
+            entries.c.mood,
+            entries.c.half,
+            func.count().label("n"),
+            func.sum(score).label("score"),
+            null().label("created_at"),
+            null().label("id")
+        ).group_by(entries.c.mood, entries.c.half)
+        
+        # Last 7 entries (as a subquery so LIMIT is allowed inside the union)
+        latest = select(Journal.mood, Journal.created_at, Journal.id).where(*in_period).order_by(
+            desc(Journal.created_at), desc(Journal.id)
+        ).limit(7).subquery()
+        recent_moods = select(
+            literal("recent").label("kind"),
+            latest.c.mood,
+            null().label("half"),
+            null().label("n"),
+            null().label("score"),
+            latest.c.created_at,
+            latest.c.id
+        )
         
-        if not journals:
+        # Both shapes in one round-trip; the recent branch goes first so the
+        # combined columns keep their types
+        mood_counts_by_half = []
+        recent = []
+        for row in db.execute(union_all(recent_moods, mood_aggregate)):
+            if row.kind == "agg":
+                mood_counts_by_half.append((row.mood, row.half, row.n, row.score))
+            else:
+                recent.append(row)
+        
+        if not mood_counts_by_half:
             return {
                 "period_days": days,
                 "total_entries": 0,
@@ -187,38 +373,42 @@ def get_mood_trend(db: Session, user_id: int, days: int = 30) -> Dict:
                 "trend": "No data available"
             }
         
-        # Count mood occurrences
-        moods = [j.mood for j in journals if j.mood]
-        mood_counts = Counter(moods)
-        
-        # Calculate percentages
-        total = len(moods)
-        mood_distribution = {
-            mood: {
+        # Count mood occurrences and per-half [entries, score] totals
+        mood_counts = Counter()
+        halves = ([0, 0], [0, 0])
+        for mood, entry_half, count, mood_score in mood_counts_by_half:
+            if mood:
+                mood_counts[mood] += count
+                halves[entry_half][0] += count
+                halves[entry_half][1] += mood_score
+        
+        # Calculate percentages and find the most common mood in one pass
+        total = halves[0][0] + halves[1][0]
+        mood_distribution = {}
+        most_common_mood, most_common_count = None, 0
+        for mood, count in mood_counts.items():
+            mood_distribution[mood] = {
                 "count": count,
                 "percentage": round((count / total) * 100, 2)
             }
-            for mood, count in mood_counts.items()
-        }
-        
-        most_common = mood_counts.most_common(1)[0] if mood_counts else (None, 0)
+            if count > most_common_count:
+                most_common_mood, most_common_count = mood, count
         
         # Simple trend analysis (comparing first half vs second half)
-        mid_point = len(journals) // 2
-        first_half_moods = [j.mood for j in journals[:mid_point] if j.mood]
-        second_half_moods = [j.mood for j in journals[mid_point:] if j.mood]
+        trend = _analyze_mood_trend(*halves[0], *halves[1])
         
-        trend = _analyze_mood_trend(first_half_moods, second_half_moods)
+        # Union rows come back unordered: sort the last 7 entries oldest first
+        recent.sort(key=lambda row: (row.created_at, row.id))
         
         return {
             "period_days": days,
-            "total_entries": len(journals),
+            "total_entries": sum(count for _, _, count, _ in mood_counts_by_half),
             "mood_distribution": mood_distribution,
-            "most_common_mood": most_common[0],
+            "most_common_mood": most_common_mood,
             "trend": trend,
             "recent_moods": [
-                {"date": str(j.created_at), "mood": j.mood}
-                for j in journals[-7:]  # Last 7 entries
+                {"date": row.created_at.isoformat() if row.created_at else None, "mood": row.mood}
+                for row in recent
             ]
         }
         
@@ -227,21 +417,26 @@ def get_mood_trend(db: Session, user_id: int, days: int = 30) -> Dict:
         raise
 
 
-def _analyze_mood_trend(first_half: List[str], second_half: List[str]) -> str:
-    """Analyze if mood is improving, declining, or stable."""
-    positive_moods = {"happy", "great", "excited", "joyful", "content", "peaceful"}
-    negative_moods = {"sad", "angry", "anxious", "stressed", "frustrated", "tired"}
-    
-    def mood_score(moods):
-        positive = sum(1 for m in moods if m.lower() in positive_moods)
-        negative = sum(1 for m in moods if m.lower() in negative_moods)
-        return positive - negative
+def _analyze_mood_trend(
+    first_count: int,
+    first_total: int,
+    second_count: int,
+    second_total: int
+) -> str:
+    """
+    Analyze if mood is improving, declining, or stable.
     
-    if not first_half or not second_half:
+    Args:
+        first_count: Entries with a mood in the first half of the period
+        first_total: Summed mood score of those entries (+1 positive, -1 negative)
+        second_count: Entries with a mood in the second half
+        second_total: Summed mood score of the second half
+    """
+    if not first_count or not second_count:
         return "Not enough data to determine trend"
     
-    first_score = mood_score(first_half) / len(first_half)
-    second_score = mood_score(second_half) / len(second_half)
+    first_score = first_total / first_count
+    second_score = second_total / second_count
     
     diff = second_score - first_score
     
@@ -253,56 +448,65 @@ def _analyze_mood_trend(first_half: List[str], second_half: List[str]) -> str:
         return "Stable - Maintaining consistent emotional patterns"
 
 
-def summarize_weekly_progress(db: Session, user_id: int) -> Dict:
+def summarize_weekly_progress(db: Session, user_id: int, now: Optional[datetime] = None) -> Dict:
     """
     Summarize user's activity and progress for the past week.
+    Without an explicit now the result is cached per user for a short TTL;
+    writes to the user's data invalidate it.
     
     Args:
         db: Database session
         user_id: User ID
+        now: Reference time (default: current UTC time)
         
     Returns:
         Dictionary with weekly summary statistics
     """
+    if now is not None:
+        # A caller-supplied reference time must not be answered from a cached
+        # summary computed for a different moment
+        return _summarize_week_ending(db, user_id, now)
+    return _summarize_current_week(db, user_id)
+
+
+@cached_per_user(insights_cache)
+def _summarize_current_week(db: Session, user_id: int) -> Dict:
+    """Summarize the week ending at the current UTC time."""
+    return _summarize_week_ending(db, user_id, datetime.utcnow())
+
+
+def _summarize_week_ending(db: Session, user_id: int, now: datetime) -> Dict:
+    """Summarize the 7 days ending at now."""
     try:
-        week_start = datetime.utcnow() - timedelta(days=7)
-        
-        # Count activities
-        journal_count = db.query(Journal).filter(
-            Journal.user_id == user_id,
-            Journal.created_at >= week_start
-        ).count()
-        
-        tasks = db.query(Task).filter(
-            Task.user_id == user_id,
-            Task.created_at >= week_start
-        ).all()
+        week_start = now - timedelta(days=7)
         
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for t in tasks if t.is_completed)
+        # Count activities (one aggregate query, no task rows loaded)
+        journal_count, total_tasks, completed_tasks = _count_activity(
+            db, user_id, since=week_start
+        )
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
         # Get XP gained this week
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-        current_xp = user_stats.total_xp if user_stats else 0
-        
-        # Get categories with most activity
-        category_activity = db.query(
-            Category.name,
-            func.count(Journal.id).label("activity_count")
-        ).join(
-            Level, Level.category_id == Category.id
-        ).outerjoin(
-            Journal, Journal.user_id == Level.user_id
-        ).filter(
-            Level.user_id == user_id,
-            Journal.created_at >= week_start
-        ).group_by(Category.name).order_by(desc("activity_count")).limit(3).all()
-        
-        top_categories = [
-            {"name": name, "activity_count": count}
-            for name, count in category_activity
-        ]
+        current_xp = db.query(UserStats.total_xp).filter(
+            UserStats.user_id == user_id
+        ).scalar() or 0
+        
+        # Get categories with most activity. Journals aren't linked to a
+        # category, so every category the user has levels in shares this
+        # week's journal count; rank them by XP instead of joining every
+        # level row against every journal row.
+        top_categories = []
+        if journal_count > 0:
+            category_names = db.query(Category.name).join(
+                Level, Level.category_id == Category.id
+            ).filter(
+                Level.user_id == user_id
+            ).order_by(desc(Level.xp)).limit(3).all()
+            
+            top_categories = [
+                {"name": name, "activity_count": journal_count}
+                for (name,) in category_names
+            ]
         
         # Generate summary message
         if journal_count >= 5 and completion_rate >= 70:
@@ -330,6 +534,43 @@ def summarize_weekly_progress(db: Session, user_id: int) -> Dict:
         raise
 
 
+def _count_activity(
+    db: Session,
+    user_id: int,
+    since: Optional[datetime] = None
+) -> Tuple[int, int, int]:
+    """
+    Count a user's journals, tasks and completed tasks in a single query.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        since: Only count journals/tasks created at or after this time
+        
+    Returns:
+        Tuple of (total_journals, total_tasks, completed_tasks)
+    """
+    # lambda_stmt caches the constructed statement; user_id / since become bound parameters
+    if since is None:
+        stmt = lambda_stmt(lambda: select(
+            select(func.count(Journal.id)).where(Journal.user_id == user_id).scalar_subquery(),
+            func.count(Task.id),
+            func.coalesce(func.sum(case((Task.is_completed == True, 1), else_=0)), 0)
+        ).where(Task.user_id == user_id))
+    else:
+        stmt = lambda_stmt(lambda: select(
+            select(func.count(Journal.id)).where(
+                Journal.user_id == user_id, Journal.created_at >= since
+            ).scalar_subquery(),
+            func.count(Task.id),
+            func.coalesce(func.sum(case((Task.is_completed == True, 1), else_=0)), 0)
+        ).where(Task.user_id == user_id, Task.created_at >= since))
+    
+    total_journals, total_tasks, completed_tasks = db.execute(stmt).one()
+    
+    return total_journals, total_tasks, completed_tasks
+
+
 def get_activity_stats(db: Session, user_id: int) -> ActivityStats:
     """
     Get overall activity statistics for a user.
@@ -342,20 +583,14 @@ def get_activity_stats(db: Session, user_id: int) -> ActivityStats:
         ActivityStats schema with comprehensive statistics
     """
     try:
-        # Count journals
-        total_journals = db.query(Journal).filter(Journal.user_id == user_id).count()
-        
-        # Count tasks
-        total_tasks = db.query(Task).filter(Task.user_id == user_id).count()
-        completed_tasks = db.query(Task).filter(
-            Task.user_id == user_id,
-            Task.is_completed == True
-        ).count()
+        total_journals, total_tasks, completed_tasks = _count_activity(db, user_id)
         
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0.0
         
-        # Get user stats
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+        # Get user stats (just the two columns needed)
+        user_stats = db.execute(lambda_stmt(lambda: select(
+            UserStats.level, UserStats.total_xp
+        ).where(UserStats.user_id == user_id))).first()
         
         return ActivityStats(
             total_journals=total_journals,
@@ -375,7 +610,8 @@ def get_recent_activity(
     db: Session,
     user_id: int,
     days: int = 7,
-    limit: int = 10
+    limit: int = 10,
+    now: Optional[datetime] = None
 ) -> RecentActivity:
     """
     Get recent journals and completed tasks.
@@ -385,29 +621,30 @@ def get_recent_activity(
         user_id: User ID
         days: Number of days to look back (default: 7)
         limit: Maximum items to return per type (default: 10)
+        now: Reference time (default: current UTC time)
         
     Returns:
         RecentActivity schema with recent journals and tasks
     """
     try:
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_date = (now or datetime.utcnow()) - timedelta(days=days)
         
         # Get recent journals
-        journals = db.query(Journal).filter(
+        journals = db.query(*_RECENT_JOURNAL_COLUMNS).filter(
             Journal.user_id == user_id,
             Journal.created_at >= start_date
         ).order_by(desc(Journal.created_at)).limit(limit).all()
         
         # Get recently completed tasks
-        completed_tasks = db.query(Task).filter(
+        completed_tasks = db.query(*_RECENT_TASK_COLUMNS).filter(
             Task.user_id == user_id,
             Task.is_completed == True,
             Task.completed_at >= start_date
         ).order_by(desc(Task.completed_at)).limit(limit).all()
         
         return RecentActivity(
-            journals=list(journals),
-            completed_tasks=list(completed_tasks),
+            journals=journals,
+            completed_tasks=completed_tasks,
             period_days=days
         )
         
@@ -416,9 +653,11 @@ def get_recent_activity(
         raise
 
 
+@cached_per_user(insights_cache)
 def get_insights_summary(db: Session, user_id: int) -> InsightsSummary:
     """
     Get a quick summary of user insights.
+    Cached per user for a short TTL; writes to the user's data invalidate it.
     
     Args:
         db: Database session
@@ -428,24 +667,27 @@ def get_insights_summary(db: Session, user_id: int) -> InsightsSummary:
         InsightsSummary schema with key metrics
     """
     try:
-        stats = get_activity_stats(db, user_id)
-        streaks = calculate_streaks(db, user_id)
+        # The summary only needs the counts: one query, no streak or XP lookups
+        total_journals, total_tasks, completed_tasks = _count_activity(db, user_id)
+        completion_rate = round(
+            (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0.0, 2
+        )
         
         # Generate personalized message
-        if stats.total_journals >= 10 and stats.completion_rate >= 70:
+        if total_journals >= 10 and completion_rate >= 70:
             message = "You're doing amazing! Your consistency is paying off. 🌟"
-        elif stats.total_journals >= 5 or stats.completion_rate >= 50:
+        elif total_journals >= 5 or completion_rate >= 50:
             message = "Great progress! Keep building those healthy habits. 💪"
-        elif stats.total_journals > 0 or stats.completed_tasks > 0:
+        elif total_journals > 0 or completed_tasks > 0:
             message = "Nice start! Small steps lead to big changes. 🌱"
         else:
             message = "Welcome to Seikatsu! Start your journey today. ✨"
         
         return InsightsSummary(
-            total_journal_entries=stats.total_journals,
-            total_tasks=stats.total_tasks,
-            completed_tasks=stats.completed_tasks,
-            completion_rate=stats.completion_rate,
+            total_journal_entries=total_journals,
+            total_tasks=total_tasks,
+            completed_tasks=completed_tasks,
+            completion_rate=completion_rate,
             message=message
         )
         
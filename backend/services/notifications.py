@@ -4,16 +4,77 @@ Handles push notifications, reminders, and streak alerts.
 Future integration with Firebase/Expo Push Notifications.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, time
-from typing import Dict, List, Optional
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, time, timedelta
+from functools import partial
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from time import monotonic, sleep
 import logging
-from models import User, Journal, Task
+import threading
+from collections import defaultdict
+from models import User, Journal, Task, SentNotification
 from services.insights import calculate_streaks
 
 logger = logging.getLogger(__name__)
 
+# Users are read in pages of this many IDs; each page is processed in its own session
+USER_PAGE_SIZE = 1000
+
+# Worker threads processing user pages concurrently during a scheduler run
+NOTIFICATION_WORKERS = 8
+
+# Attempts per user when a transient database error occurs, backing off from USER_RETRY_DELAY seconds
+USER_MAX_ATTEMPTS = 3
+USER_RETRY_DELAY = 1.0
+
+# Maximum messages per push request (Expo accepts at most 100 per request)
+PUSH_BATCH_SIZE = 100
+
+# Messages per second allowed through to the push service (Expo caps at 600/s)
+PUSH_RATE_LIMIT = 500
+
+# Attempts per push request, backing off exponentially from PUSH_RETRY_DELAY seconds
+PUSH_MAX_ATTEMPTS = 5
+PUSH_RETRY_DELAY = 0.5
+
+
+class _TokenBucket:
+    """Thread-safe token bucket refilling at rate tokens per second, up to capacity."""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until tokens are available, then take them."""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            sleep(wait)
+
+
+# Shared by every NotificationService so concurrent workers respect one limit
+_push_rate_limiter = _TokenBucket(rate=PUSH_RATE_LIMIT, capacity=PUSH_RATE_LIMIT)
+
+# Streak lengths (days) that trigger a milestone notification
+STREAK_MILESTONES = frozenset({7, 14, 21, 30, 60, 90, 100, 200, 365})
+
 # Notification templates
 NOTIFICATION_TEMPLATES = {
     "daily_reminder": {
@@ -59,6 +120,47 @@ NOTIFICATION_TEMPLATES = {
 }
 
 
+
+def _compile_body(body: str) -> Callable[..., str]:
+    """
+    Compile a template body into a function taking its fields as keyword arguments,
+    e.g. "{days}-day streak" -> lambda *, days: f"{days}-day streak".
+    The format string is parsed once here instead of on every str.format call.
+    """
+    source, fields = [], []
+    for literal, field, spec, conversion in Formatter().parse(body):
+        source.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if not field.isidentifier():
+            # Indexed/attribute fields: keep using str.format
+            return body.format
+        if field not in fields:
+            fields.append(field)
+        source.append(
+            "{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}"
+        )
+    params = f"*, {', '.join(fields)}" if fields else ""
+    return eval(f"lambda {params}: f{''.join(source)!r}", {})
+
+
+# Templates bound once so notifiers skip the by-name lookup
+_DAILY_REMINDER = NOTIFICATION_TEMPLATES["daily_reminder"]
+_STREAK_MILESTONE = NOTIFICATION_TEMPLATES["streak_milestone"]
+_STREAK_WARNING = NOTIFICATION_TEMPLATES["streak_warning"]
+_STREAK_LOST = NOTIFICATION_TEMPLATES["streak_lost"]
+_TASK_DUE_SOON = NOTIFICATION_TEMPLATES["task_due_soon"]
+_TASK_OVERDUE = NOTIFICATION_TEMPLATES["task_overdue"]
+_LEVEL_UP = NOTIFICATION_TEMPLATES["level_up"]
+_WEEKLY_SUMMARY = NOTIFICATION_TEMPLATES["weekly_summary"]
+
+# Template bodies compiled once at import
+_BODY_FORMATTERS = {
+    key: _compile_body(template["body"])
+    for key, template in NOTIFICATION_TEMPLATES.items()
+}
+
+
 class NotificationService:
     """Service for managing notifications."""
     
@@ -77,7 +179,8 @@ class NotificationService:
         title: str,
         body: str,
         data: Optional[Dict] = None,
-        priority: str = "normal"
+        priority: str = "normal",
+        dedupe_key: Optional[str] = None
     ) -> Dict:
         """
         Send a push notification to a user.
@@ -88,6 +191,8 @@ class NotificationService:
             body: Notification body
             data: Additional data payload
             priority: Notification priority (normal/high)
+            dedupe_key: Sent at most once per user and day under this key, when
+                sent through a batch that has a session (see claim_notifications)
             
         Returns:
             Dictionary with send status
@@ -96,25 +201,9 @@ class NotificationService:
             # This is where you'd integrate with Expo Push or Firebase
             # For now, we'll just log it
             
-            notification = {
-                "user_id": user_id,
-                "title": title,
-                "body": body,
-                "data": data or {},
-                "priority": priority,
-                "sent_at": datetime.utcnow().isoformat()
-            }
+            notification = self._build_notification(user_id, title, body, data, priority, dedupe_key)
             
-            if self.push_service:
-                # Example Expo Push integration:
-                # response = self.push_service.publish({
-                #     "to": user_push_token,
-                #     "title": title,
-                #     "body": body,
-                #     "data": data,
-                #     "priority": priority
-                # })
-                pass
+            self._push([notification])
             
             logger.info(f"Notification sent to user {user_id}: {title}")
             
@@ -129,9 +218,235 @@ class NotificationService:
                 "success": False,
                 "error": str(e)
             }
+    
+    def send_notifications_bulk(self, notifications: List[Dict]) -> Dict:
+        """
+        Send many notifications in chunks of PUSH_BATCH_SIZE per push request.
+        
+        Args:
+            notifications: Notification dicts as built by send_notification
+            
+        Returns:
+            Dictionary with sent/failed counts
+        """
+        sent, failed = 0, 0
+        
+        for chunk in _chunk(notifications, PUSH_BATCH_SIZE):
+            try:
+                self._push(chunk)
+                sent += len(chunk)
+            except Exception as e:
+                logger.error(f"Error sending batch of {len(chunk)} notifications: {str(e)}")
+                failed += len(chunk)
+        
+        logger.info(f"Sent {sent} notifications in batches of up to {PUSH_BATCH_SIZE} ({failed} failed)")
+        
+        return {"success": failed == 0, "sent": sent, "failed": failed}
+    
+    def _push(self, notifications: List[Dict]) -> None:
+        """
+        Deliver notifications in one push request, rate limited and retried
+        with exponential backoff on failure.
+        """
+        for attempt in range(1, PUSH_MAX_ATTEMPTS + 1):
+            _push_rate_limiter.acquire(len(notifications))
+            try:
+                self._publish(notifications)
+                return
+            except Exception as e:
+                if attempt == PUSH_MAX_ATTEMPTS:
+                    raise
+                delay = PUSH_RETRY_DELAY * 2 ** (attempt - 1)
+                logger.warning(f"Push request failed (attempt {attempt}), retrying in {delay}s: {str(e)}")
+                sleep(delay)
+    
+    def _publish(self, notifications: List[Dict]) -> None:
+        """Send one push request for notifications (at most PUSH_BATCH_SIZE)."""
+        if self.push_service:
+            # Example Expo Push integration:
+            # response = self.push_service.publish_multiple([
+            #     PushMessage(
+            #         to=user_push_token,
+            #         title=n["title"],
+            #         body=n["body"],
+            #         data=n["data"],
+            #         priority=n["priority"]
+            #     )
+            #     for n in notifications
+            # ])
+            pass
+    
+    def batch(self, db: Optional[Session] = None) -> "NotificationBatch":
+        """
+        Start a batch that queues notifications until flush() is called.
+        With a session, flush() skips notifications already sent today (see dedupe_key).
+        """
+        return NotificationBatch(self, db)
+    
+    @staticmethod
+    def _build_notification(
+        user_id: int,
+        title: str,
+        body: str,
+        data: Optional[Dict],
+        priority: str,
+        dedupe_key: Optional[str] = None
+    ) -> Dict:
+        """Build the notification payload sent to the push service."""
+        notification = {
+            "user_id": user_id,
+            "title": title,
+            "body": body,
+            "data": data or {},
+            "priority": priority,
+            "sent_at": datetime.utcnow().isoformat()
+        }
+        if dedupe_key is not None:
+            notification["dedupe_key"] = dedupe_key
+        return notification
 
 
-def send_daily_reminder(db: Session, user_id: int, notification_service: NotificationService) -> Dict:
+class NotificationBatch:
+    """
+    Drop-in stand-in for NotificationService that queues notifications
+    and sends them in bulk on flush(). Not thread-safe; use one per worker.
+    """
+    
+    def __init__(self, notification_service: NotificationService, db: Optional[Session] = None):
+        self.notification_service = notification_service
+        self.db = db
+        self.pending: List[Dict] = []
+    
+    def send_notification(
+        self,
+        user_id: int,
+        title: str,
+        body: str,
+        data: Optional[Dict] = None,
+        priority: str = "normal",
+        dedupe_key: Optional[str] = None
+    ) -> Dict:
+        """Queue a notification; it is sent by the next flush()."""
+        notification = NotificationService._build_notification(
+            user_id, title, body, data, priority, dedupe_key
+        )
+        self.pending.append(notification)
+        return {"success": True, "queued": True, "notification": notification}
+    
+    def discard_from(self, position: int) -> None:
+        """Drop notifications queued at or after position (e.g. by a failed attempt)."""
+        del self.pending[position:]
+    
+    def flush(self) -> Dict:
+        """Send every queued notification in bulk and empty the queue."""
+        pending, self.pending = self.pending, []
+        if self.db is not None:
+            pending = claim_notifications(self.db, pending)
+        if not pending:
+            return {"success": True, "sent": 0, "failed": 0}
+        return self.notification_service.send_notifications_bulk(pending)
+
+
+# INSERT ... ON CONFLICT DO NOTHING constructs for the ledger, by dialect
+_LEDGER_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def claim_notifications(db: Session, notifications: List[Dict]) -> List[Dict]:
+    """
+    Record notifications with a dedupe_key in the sent_notifications ledger and
+    drop those already recorded today, so a re-run scheduler doesn't send them twice.
+    Notifications without a dedupe_key are always kept.
+    
+    Args:
+        db: Database session (committed after the ledger rows are written)
+        notifications: Notification dicts as built by send_notification
+        
+    Returns:
+        Notifications that should be sent
+    """
+    keyed = {
+        (n["user_id"], n["dedupe_key"]) for n in notifications if "dedupe_key" in n
+    }
+    if not keyed:
+        return notifications
+    
+    insert = _LEDGER_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        logger.warning("Notification ledger not supported on this database; sending without dedupe")
+        return notifications
+    
+    bucket_date = datetime.utcnow().date()
+    # Executemany-style bulk insert: SQLAlchemy batches the rows into multi-row
+    # INSERTs (insertmanyvalues) without per-object ORM overhead
+    claimed = set(db.execute(
+        insert(SentNotification)
+        .on_conflict_do_nothing()
+        .returning(SentNotification.user_id, SentNotification.notification_key),
+        [
+            {"user_id": user_id, "notification_key": key, "bucket_date": bucket_date}
+            for user_id, key in keyed
+        ]
+    ).all())
+    db.commit()
+    
+    if len(claimed) < len(keyed):
+        logger.info(f"Skipping {len(keyed) - len(claimed)} notifications already sent today")
+    
+    return [
+        n for n in notifications
+        if "dedupe_key" not in n or (n["user_id"], n["dedupe_key"]) in claimed
+    ]
+
+
+def _chunk(items: List, size: int) -> List[List]:
+    """Split items into consecutive lists of at most size items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _today_start(now: Optional[datetime] = None) -> datetime:
+    """Midnight (UTC) at the start of the day containing now (default: current UTC time)."""
+    return datetime.combine((now or datetime.utcnow()).date(), time.min)
+
+
+def _has_journaled_today(db: Session, user_id: int, now: Optional[datetime] = None) -> bool:
+    """Whether the user has written a journal entry today (UTC)."""
+    today_start = _today_start(now)
+    # Range on created_at (not date(created_at)) so the (user_id, created_at) index is used
+    return db.query(
+        db.query(Journal.id).filter(
+            Journal.user_id == user_id,
+            Journal.created_at >= today_start,
+            Journal.created_at < today_start + timedelta(days=1)
+        ).exists()
+    ).scalar()
+
+
+def get_users_journaled_today(db: Session, now: Optional[datetime] = None) -> Set[int]:
+    """
+    Get every user who has written a journal entry today (UTC), in one query.
+    
+    Args:
+        db: Database session
+        now: Reference time (default: current UTC time)
+        
+    Returns:
+        Set of user IDs
+    """
+    today_start = _today_start(now)
+    rows = db.query(Journal.user_id).filter(
+        Journal.created_at >= today_start,
+        Journal.created_at < today_start + timedelta(days=1)
+    ).distinct()
+    return {user_id for (user_id,) in rows}
+
+
+def send_daily_reminder(
+    db: Session,
+    user_id: int,
+    notification_service: NotificationService,
+    journaled_today: Optional[Set[int]] = None,
+    now: Optional[datetime] = None
+) -> Dict:
     """
     Send daily journal reminder to user.
     
@@ -139,29 +454,31 @@ def send_daily_reminder(db: Session, user_id: int, notification_service: Notific
         db: Database session
         user_id: User ID
         notification_service: NotificationService instance
+        journaled_today: Users known to have journaled today (skips the per-user query)
+        now: Reference time (default: current UTC time)
         
     Returns:
         Dictionary with send status
     """
     try:
         # Check if user already journaled today
-        today = datetime.utcnow().date()
-        journal_today = db.query(Journal).filter(
-            Journal.user_id == user_id,
-            func.date(Journal.created_at) == today
-        ).first()
+        if journaled_today is not None:
+            journal_today = user_id in journaled_today
+        else:
+            journal_today = _has_journaled_today(db, user_id, now)
         
         if journal_today:
             logger.info(f"User {user_id} already journaled today, skipping reminder")
             return {"success": False, "reason": "Already journaled today"}
         
-        template = NOTIFICATION_TEMPLATES["daily_reminder"]
+        template = _DAILY_REMINDER
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"],
-            priority=template["priority"]
+            body=_BODY_FORMATTERS["daily_reminder"](),
+            priority=template["priority"],
+            dedupe_key="daily_reminder"
         )
         
     except Exception as e:
@@ -189,19 +506,18 @@ def notify_streak_milestone(
     """
     try:
         # Only notify on milestone days (7, 14, 30, 60, 100, etc.)
-        milestones = [7, 14, 21, 30, 60, 90, 100, 200, 365]
-        
-        if streak_days not in milestones:
+        if streak_days not in STREAK_MILESTONES:
             return {"success": False, "reason": "Not a milestone day"}
         
-        template = NOTIFICATION_TEMPLATES["streak_milestone"]
+        template = _STREAK_MILESTONE
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(days=streak_days),
+            body=_BODY_FORMATTERS["streak_milestone"](days=streak_days),
             data={"streak_days": streak_days, "type": "milestone"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key=f"streak_milestone:{streak_days}"
         )
         
     except Exception as e:
@@ -212,7 +528,9 @@ def notify_streak_milestone(
 def notify_streak_warning(
     db: Session,
     user_id: int,
-    notification_service: NotificationService
+    notification_service: NotificationService,
+    journaled_today: Optional[Set[int]] = None,
+    now: Optional[datetime] = None
 ) -> Dict:
     """
     Alert user if their streak is at risk (haven't journaled today).
@@ -221,35 +539,37 @@ def notify_streak_warning(
         db: Database session
         user_id: User ID
         notification_service: NotificationService instance
+        journaled_today: Users known to have journaled today (skips the per-user query)
+        now: Reference time (default: current UTC time)
         
     Returns:
         Dictionary with send status
     """
     try:
-        streaks = calculate_streaks(db, user_id)
+        # Check if user journaled today (no streak query needed if they have)
+        if journaled_today is not None:
+            journal_today = user_id in journaled_today
+        else:
+            journal_today = _has_journaled_today(db, user_id, now)
+        
+        if journal_today:
+            return {"success": False, "reason": "Already journaled today"}
+        
+        streaks = calculate_streaks(db, user_id, now=now)
         
         # Only send if user has an active streak
         if streaks.journal_streak == 0:
             return {"success": False, "reason": "No active streak"}
         
-        # Check if user journaled today
-        today = datetime.utcnow().date()
-        journal_today = db.query(Journal).filter(
-            Journal.user_id == user_id,
-            func.date(Journal.created_at) == today
-        ).first()
-        
-        if journal_today:
-            return {"success": False, "reason": "Already journaled today"}
-        
-        template = NOTIFICATION_TEMPLATES["streak_warning"]
+        template = _STREAK_WARNING
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(days=streaks.journal_streak),
+            body=_BODY_FORMATTERS["streak_warning"](days=streaks.journal_streak),
             data={"streak_days": streaks.journal_streak, "type": "warning"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key="streak_warning"
         )
         
     except Exception as e:
@@ -280,14 +600,15 @@ def notify_streak_lost(
         if lost_streak < 3:
             return {"success": False, "reason": "Streak too short to notify"}
         
-        template = NOTIFICATION_TEMPLATES["streak_lost"]
+        template = _STREAK_LOST
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(days=lost_streak),
+            body=_BODY_FORMATTERS["streak_lost"](days=lost_streak),
             data={"lost_streak": lost_streak, "type": "streak_lost"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key="streak_lost"
         )
         
     except Exception as e:
@@ -300,7 +621,8 @@ def notify_task_due_soon(
     user_id: int,
     task_id: int,
     notification_service: NotificationService,
-    hours_before: int = 24
+    hours_before: int = 24,
+    task=None
 ) -> Dict:
     """
     Notify user about upcoming task deadline.
@@ -311,28 +633,35 @@ def notify_task_due_soon(
         task_id: Task ID
         notification_service: NotificationService instance
         hours_before: Hours before due date to notify (default: 24)
+        task: Already loaded incomplete task (or row with title/due_date); skips the lookup
         
     Returns:
         Dictionary with send status
     """
     try:
-        task = db.query(Task).filter(
-            Task.id == task_id,
-            Task.user_id == user_id,
-            Task.is_completed == False
-        ).first()
+        # Reject an invalid window before touching the database
+        if hours_before <= 0:
+            return {"success": False, "reason": "Invalid window"}
+        
+        if task is None:
+            task = db.query(Task).filter(
+                Task.id == task_id,
+                Task.user_id == user_id,
+                Task.is_completed == False
+            ).first()
         
         if not task or not task.due_date:
             return {"success": False, "reason": "Task not found or no due date"}
         
-        template = NOTIFICATION_TEMPLATES["task_due_soon"]
+        template = _TASK_DUE_SOON
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(task_title=task.title, hours=hours_before),
+            body=_BODY_FORMATTERS["task_due_soon"](task_title=task.title, hours=hours_before),
             data={"task_id": task_id, "type": "task_due_soon"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key=f"task_due_soon:{task_id}"
         )
         
     except Exception as e:
@@ -344,7 +673,8 @@ def notify_task_overdue(
     db: Session,
     user_id: int,
     task_id: int,
-    notification_service: NotificationService
+    notification_service: NotificationService,
+    task=None
 ) -> Dict:
     """
     Notify user about overdue task.
@@ -354,28 +684,31 @@ def notify_task_overdue(
         user_id: User ID
         task_id: Task ID
         notification_service: NotificationService instance
+        task: Already loaded incomplete task (or row with title); skips the lookup
         
     Returns:
         Dictionary with send status
     """
     try:
-        task = db.query(Task).filter(
-            Task.id == task_id,
-            Task.user_id == user_id,
-            Task.is_completed == False
-        ).first()
+        if task is None:
+            task = db.query(Task).filter(
+                Task.id == task_id,
+                Task.user_id == user_id,
+                Task.is_completed == False
+            ).first()
         
         if not task:
             return {"success": False, "reason": "Task not found"}
         
-        template = NOTIFICATION_TEMPLATES["task_overdue"]
+        template = _TASK_OVERDUE
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(task_title=task.title),
+            body=_BODY_FORMATTERS["task_overdue"](task_title=task.title),
             data={"task_id": task_id, "type": "task_overdue"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key=f"task_overdue:{task_id}"
         )
         
     except Exception as e:
@@ -402,14 +735,15 @@ def notify_level_up(
         Dictionary with send status
     """
     try:
-        template = NOTIFICATION_TEMPLATES["level_up"]
+        template = _LEVEL_UP
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(level=new_level),
+            body=_BODY_FORMATTERS["level_up"](level=new_level),
             data={"level": new_level, "type": "level_up"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key=f"level_up:{new_level}"
         )
         
     except Exception as e:
@@ -438,17 +772,18 @@ def send_weekly_summary(
         
         summary = summarize_weekly_progress(db, user_id)
         
-        template = NOTIFICATION_TEMPLATES["weekly_summary"]
+        template = _WEEKLY_SUMMARY
         
         return notification_service.send_notification(
             user_id=user_id,
             title=template["title"],
-            body=template["body"].format(
+            body=_BODY_FORMATTERS["weekly_summary"](
                 tasks=summary["tasks_completed"],
                 journals=summary["journals_written"]
             ),
             data={"summary": summary, "type": "weekly_summary"},
-            priority=template["priority"]
+            priority=template["priority"],
+            dedupe_key="weekly_summary"
         )
         
     except Exception as e:
@@ -456,57 +791,258 @@ def send_weekly_summary(
         raise
 
 
+def load_notification_tasks(
+    db: Session,
+    user_ids: Sequence[int],
+    days_ahead: int = 1
+) -> Dict[int, Tuple[List, List]]:
+    """
+    Load incomplete tasks due soon and overdue for many users in one query.
+    
+    Args:
+        db: Database session
+        user_ids: User IDs to load tasks for
+        days_ahead: Tasks due within this many days count as due soon (default: 1)
+        
+    Returns:
+        Dictionary of user_id -> (due_soon, overdue) lists of task rows
+        (user_id, id, title, due_date, is_overdue), each ordered by due date
+    """
+    from services.tasks_service import get_utc_now
+    
+    now = get_utc_now()
+    rows = db.query(
+        Task.user_id, Task.id, Task.title, Task.due_date, (Task.due_date < now).label("is_overdue")
+    ).filter(
+        Task.user_id.in_(user_ids),
+        Task.is_completed == False,
+        Task.due_date.isnot(None),
+        Task.due_date <= now + timedelta(days=days_ahead)
+    ).order_by(Task.due_date).all()
+    
+    tasks_by_user = defaultdict(lambda: ([], []))
+    for row in rows:
+        due_soon, overdue = tasks_by_user[row.user_id]
+        (overdue if row.is_overdue else due_soon).append(row)
+    
+    return tasks_by_user
+
+
+def process_user_notifications(
+    db: Session,
+    user_id: int,
+    notification_service: NotificationService,
+    journaled_today: Optional[Set[int]] = None,
+    tasks_by_user: Optional[Dict[int, Tuple[List, List]]] = None,
+    now: Optional[datetime] = None
+):
+    """
+    Run every scheduled notification check for a single user.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        notification_service: NotificationService instance
+        journaled_today: Users known to have journaled today (skips the per-user queries)
+        tasks_by_user: Preloaded (due_soon, overdue) tasks from load_notification_tasks
+        now: Reference time shared by a whole scheduler run (default: current UTC time)
+    """
+    # Send daily reminder (should be scheduled for user's preferred time)
+    send_daily_reminder(db, user_id, notification_service, journaled_today, now)
+    
+    # Check for streak warnings
+    notify_streak_warning(db, user_id, notification_service, journaled_today, now)
+    
+    if tasks_by_user is None:
+        tasks_by_user = load_notification_tasks(db, [user_id])
+    due_soon, overdue = tasks_by_user.get(user_id, ([], []))
+    
+    # Tasks due within 24 hours
+    for task in due_soon:
+        notify_task_due_soon(
+            db, user_id, task.id,
+            notification_service, hours_before=24, task=task
+        )
+    
+    # Overdue tasks
+    for task in overdue:
+        notify_task_overdue(db, user_id, task.id, notification_service, task=task)
+
+
+def _notification_page_data(db: Session, user_ids: Sequence[int]) -> Dict:
+    """Bulk-load the data process_user_notifications needs for a page of users."""
+    return {"tasks_by_user": load_notification_tasks(db, user_ids)}
+
+
+def _run_user_with_retry(
+    db: Session,
+    user_fn: Callable,
+    user_id: int,
+    batch: NotificationBatch,
+    page_data: Dict
+) -> bool:
+    """
+    Run user_fn for one user, retrying transient database errors with backoff.
+    Notifications queued by a failed attempt are discarded so retries don't duplicate them.
+    
+    Returns:
+        True if the user was processed, False if every attempt failed
+    """
+    for attempt in range(1, USER_MAX_ATTEMPTS + 1):
+        queued = len(batch.pending)
+        try:
+            user_fn(db, user_id, batch, **page_data)
+            return True
+        except OperationalError as user_error:
+            db.rollback()
+            batch.discard_from(queued)
+            if attempt == USER_MAX_ATTEMPTS:
+                logger.error(
+                    f"Error processing notifications for user {user_id} "
+                    f"after {attempt} attempts: {str(user_error)}"
+                )
+                return False
+            delay = USER_RETRY_DELAY * 2 ** (attempt - 1)
+            logger.warning(
+                f"Transient error processing notifications for user {user_id} "
+                f"(attempt {attempt}), retrying in {delay}s: {str(user_error)}"
+            )
+            sleep(delay)
+        except Exception as user_error:
+            db.rollback()
+            batch.discard_from(queued)
+            logger.error(f"Error processing notifications for user {user_id}: {str(user_error)}")
+            return False
+    return False
+
+
+def _process_user_page(
+    session_factory,
+    user_fn: Callable,
+    user_ids: Sequence[int],
+    notification_service: NotificationService,
+    page_loader: Optional[Callable] = None
+) -> Tuple[int, int]:
+    """
+    Run user_fn for a page of users in its own session (Sessions are not thread-safe).
+    page_loader(db, user_ids), if given, bulk-loads extra keyword arguments for user_fn.
+    Notifications are collected while the page runs and pushed in bulk afterwards.
+    """
+    db = session_factory()
+    # Queue the page's notifications and send them in bulk at the end,
+    # skipping any already sent today (sent_notifications ledger)
+    batch = notification_service.batch(db)
+    processed, failed = 0, 0
+    try:
+        page_data = page_loader(db, user_ids) if page_loader else {}
+        for user_id in user_ids:
+            if _run_user_with_retry(db, user_fn, user_id, batch, page_data):
+                processed += 1
+            else:
+                failed += 1
+        batch.flush()
+    finally:
+        db.close()
+    return processed, failed
+
+
+def _fan_out_users(
+    db: Session,
+    user_fn: Callable,
+    notification_service: NotificationService,
+    page_loader: Optional[Callable] = None
+) -> Tuple[int, int]:
+    """
+    Run user_fn(db, user_id, notification_service) for every user.
+    User IDs are streamed in pages of USER_PAGE_SIZE and the pages are
+    processed concurrently by NOTIFICATION_WORKERS threads.
+    
+    Returns:
+        Tuple of (processed, failed) user counts
+    """
+    session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+    # Server-side cursor on PostgreSQL: pages are fetched as workers free up
+    user_pages = db.execute(
+        select(User.id).execution_options(stream_results=True, yield_per=USER_PAGE_SIZE)
+    ).scalars().partitions()
+    
+    processed, failed = 0, 0
+    
+    def _collect(done):
+        nonlocal processed, failed
+        for future in done:
+            page_processed, page_failed = future.result()
+            processed += page_processed
+            failed += page_failed
+    
+    with ThreadPoolExecutor(max_workers=NOTIFICATION_WORKERS) as executor:
+        # At most NOTIFICATION_WORKERS pages in flight, so only that many pages
+        # of IDs are held in memory however many users there are
+        pending = set()
+        for page in user_pages:
+            if len(pending) >= NOTIFICATION_WORKERS:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+            pending.add(executor.submit(
+                _process_user_page, session_factory, user_fn, page, notification_service, page_loader
+            ))
+        _collect(wait(pending).done)
+    
+    return processed, failed
+
+
 def schedule_notifications(db: Session, notification_service: NotificationService):
     """
     Main scheduler function to check and send all scheduled notifications.
     This should be called by a background task scheduler (e.g., APScheduler, Celery).
     
     Args:
-        db: Database session
+        db: Database session (used to list users; each page of users gets its own session)
         notification_service: NotificationService instance
     """
     try:
         logger.info("Running scheduled notification checks...")
         
-        # Get all users
-        users = db.query(User).all()
+        # One "today" for the whole run, so every user sees the same day boundary
+        now = datetime.utcnow()
         
-        for user in users:
-            try:
-                # Send daily reminder (should be scheduled for user's preferred time)
-                send_daily_reminder(db, user.id, notification_service)
-                
-                # Check for streak warnings
-                notify_streak_warning(db, user.id, notification_service)
-                
-                # Check for due tasks (24 hours before)
-                from services.tasks_service import get_due_tasks
-                due_soon = get_due_tasks(db, user.id, days_ahead=1)
-                
-                for task in due_soon:
-                    notify_task_due_soon(
-                        db, user.id, task.id,
-                        notification_service, hours_before=24
-                    )
-                
-                # Check for overdue tasks
-                from services.tasks_service import get_overdue_tasks
-                overdue = get_overdue_tasks(db, user.id)
-                
-                for task in overdue:
-                    notify_task_overdue(db, user.id, task.id, notification_service)
-                
-            except Exception as user_error:
-                logger.error(f"Error processing notifications for user {user.id}: {str(user_error)}")
-                continue
-        
-        logger.info("Completed scheduled notification checks")
+        # One query for who has journaled today instead of two per user
+        journaled_today = get_users_journaled_today(db, now)
+        
+        processed, failed = _fan_out_users(
+            db,
+            partial(process_user_notifications, journaled_today=journaled_today, now=now),
+            notification_service,
+            page_loader=_notification_page_data
+        )
+        
+        logger.info(f"Completed scheduled notification checks: {processed} users processed, {failed} failed")
         
     except Exception as e:
         logger.error(f"Error in notification scheduler: {str(e)}")
         raise
 
 
+def schedule_weekly_summaries(db: Session, notification_service: NotificationService):
+    """
+    Send the weekly summary notification to every user.
+    
+    Args:
+        db: Database session (used to list users; each page of users gets its own session)
+        notification_service: NotificationService instance
+    """
+    try:
+        logger.info("Sending weekly summaries...")
+        
+        processed, failed = _fan_out_users(db, send_weekly_summary, notification_service)
+        
+        logger.info(f"Completed weekly summaries: {processed} users processed, {failed} failed")
+        
+    except Exception as e:
+        logger.error(f"Error sending weekly summaries: {str(e)}")
+        raise
+
+
 # Background task setup example (using APScheduler)
 def setup_notification_scheduler(db: Session, notification_service: NotificationService):
     """
@@ -537,7 +1073,8 @@ def setup_notification_scheduler(db: Session, notification_service: Notification
         
         # Daily reminders at 8 PM
         scheduler.add_job(
-            func=lambda: schedule_notifications(db, notification_service),
+            func=schedule_notifications,
+            args=[db, notification_service],
             trigger=CronTrigger(hour=20, minute=0),
             id='daily_reminders',
             name='Send daily reminders',
@@ -546,10 +1083,8 @@ def setup_notification_scheduler(db: Session, notification_service: Notification
         
         # Weekly summary on Sundays at 6 PM
         scheduler.add_job(
-            func=lambda: [
-                send_weekly_summary(db, user.id, notification_service)
-                for user in db.query(User).all()
-            ],
+            func=schedule_weekly_summaries,
+            args=[db, notification_service],
             trigger=CronTrigger(day_of_week='sun', hour=18, minute=0),
             id='weekly_summary',
             name='Send weekly summaries',
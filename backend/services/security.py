@@ -4,16 +4,20 @@ Handles authentication, password hashing, JWT tokens, and user verification.
 """
 
 from datetime import datetime, timedelta
+from time import perf_counter, time
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+import jwt
+from jwt import InvalidTokenError
+import bcrypt
+import os
+from sqlalchemy.orm import Session, load_only
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import logging
 
 from models import User
 from schemas import TokenData
+from services._cache import BoundedTTLMap
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +25,83 @@ logger = logging.getLogger(__name__)
 SECRET_KEY = "your-secret-key-here-change-in-production"  # CHANGE THIS IN PRODUCTION!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+_ACCESS_TOKEN_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor: each +1 doubles the time of every login and registration,
+# and doubles the work of an offline attack on a leaked hash. Set BCRYPT_ROUNDS to
+# pin it; otherwise it is calibrated at startup so one hash takes about
+# BCRYPT_TARGET_MS on this host, never going below BCRYPT_MIN_ROUNDS (passlib's
+# default of 12, which existing hashes use). Only an explicit BCRYPT_ROUNDS can go lower.
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "150"))
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 31
+
+# Cheap cost factor timed during calibration (2**4 times faster than 12)
+_CALIBRATION_ROUNDS = 8
+
+# bcrypt only uses the first 72 bytes of a password
+BCRYPT_MAX_BYTES = 72
+
+
+def _calibrate_bcrypt_rounds(target_ms: float = BCRYPT_TARGET_MS) -> int:
+    """
+    Pick the bcrypt cost factor whose hashing time is closest to target_ms.
+    
+    Args:
+        target_ms: Wanted time for one hash, in milliseconds
+        
+    Returns:
+        Cost factor between BCRYPT_MIN_ROUNDS and BCRYPT_MAX_ROUNDS
+    """
+    salt = bcrypt.gensalt(rounds=_CALIBRATION_ROUNDS)
+    timings = []
+    for _ in range(3):
+        start = perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        timings.append(perf_counter() - start)
+    
+    # Best of three, then double per extra round until the target is reached
+    elapsed_ms = min(timings) * 1000
+    rounds = _CALIBRATION_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed_ms * 1.5 < target_ms:
+        elapsed_ms *= 2
+        rounds += 1
+    
+    return max(rounds, BCRYPT_MIN_ROUNDS)
+
+
+_BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "0")) or _calibrate_bcrypt_rounds()
+if _BCRYPT_ROUNDS < BCRYPT_MIN_ROUNDS:
+    logger.warning(
+        f"BCRYPT_ROUNDS={_BCRYPT_ROUNDS} is below the default cost factor {BCRYPT_MIN_ROUNDS}; "
+        f"new password hashes are weaker against brute force"
+    )
+else:
+    logger.info(f"Using bcrypt cost factor {_BCRYPT_ROUNDS}")
+
+# Checked against when a login matches no user, so that costs as much as a wrong password
+_DUMMY_HASH = bcrypt.hashpw(b"seikatsu-dummy-password", bcrypt.gensalt(rounds=_BCRYPT_ROUNDS)).decode("ascii")
+
+# Access tokens recently issued per user, reused while they are at most
+# TOKEN_REUSE_SECONDS old (refresh/verification tokens are never cached)
+TOKEN_REUSE_SECONDS = 10
+ISSUED_TOKEN_CACHE_SIZE = 10_000
+_issued_tokens = BoundedTTLMap(ISSUED_TOKEN_CACHE_SIZE)
+
+# Decoded access tokens, so a client reusing its token skips the signature check;
+# entries are only trusted until the token's own expiry (oldest evicted first)
+DECODED_TOKEN_CACHE_SIZE = 10_000
+_decoded_tokens = BoundedTTLMap(DECODED_TOKEN_CACHE_SIZE)
+
+# Logins recently looked up and not found, so floods of attempts against unknown
+# accounts (credential stuffing) don't each hit the database
+UNKNOWN_LOGIN_TTL = 5
+UNKNOWN_LOGIN_CACHE_SIZE = 10_000
+_unknown_logins = BoundedTTLMap(UNKNOWN_LOGIN_CACHE_SIZE)
+
+# Challenge header sent with every 401 from get_current_user
+_BEARER_CHALLENGE = {"WWW-Authenticate": "Bearer"}
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -31,17 +109,21 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 # ==================== PASSWORD HASHING ====================
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, work_factor: Optional[int] = None) -> str:
     """
     Hash a plain password.
+    The cost factor is stored in the hash, so hashes made with another
+    work factor keep verifying.
     
     Args:
         password: Plain text password
+        work_factor: bcrypt cost factor (defaults to the calibrated one)
         
     Returns:
         Hashed password string
     """
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=work_factor or _BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8")[:BCRYPT_MAX_BYTES], salt).decode("ascii")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -55,7 +137,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8")[:BCRYPT_MAX_BYTES],
+        hashed_password.encode("ascii"),
+    )
 
 
 # ==================== JWT TOKEN FUNCTIONS ====================
@@ -71,17 +156,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         Encoded JWT token string
     """
-    to_encode = data.copy()
+    now = int(time())
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Plain {"sub": username} tokens with the default lifetime are reused for a
+    # few seconds, so bursts of logins/refreshes by one user sign only once
+    subject = data.get("sub") if expires_delta is None and len(data) == 1 else None
+    if subject is not None:
+        cached = _issued_tokens.get(subject)
+        if cached is not None:
+            return cached
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    ttl = int(expires_delta.total_seconds()) if expires_delta else _ACCESS_TOKEN_TTL_SECONDS
+    expires = now + ttl
+    # Integer epoch expiry (valid per the JWT spec) avoids building datetimes per token
+    token = jwt.encode({**data, "exp": expires}, SECRET_KEY, algorithm=ALGORITHM)
     
-    return encoded_jwt
+    if subject is not None:
+        _issued_tokens.set(subject, token, TOKEN_REUSE_SECONDS)
+    
+    return token
 
 
 def decode_access_token(token: str) -> Optional[TokenData]:
@@ -94,6 +187,10 @@ def decode_access_token(token: str) -> Optional[TokenData]:
     Returns:
         TokenData with username if valid, None otherwise
     """
+    cached = _decoded_tokens.get(token)
+    if cached is not None:
+        return cached
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: Optional[str] = payload.get("sub")
@@ -101,15 +198,32 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         if username is None:
             return None
         
-        return TokenData(username=username)
+        token_data = TokenData(username=username)
         
-    except JWTError as e:
+    except InvalidTokenError as e:
         logger.error(f"JWT decode error: {str(e)}")
         return None
+    
+    expires = payload.get("exp")
+    if isinstance(expires, (int, float)):
+        _decoded_tokens.set(token, token_data, expires - time())
+    
+    return token_data
 
 
 # ==================== USER AUTHENTICATION ====================
 
+def _remember_unknown_login(username: str) -> None:
+    """Cache a login that matched no user for UNKNOWN_LOGIN_TTL seconds."""
+    _unknown_logins.set(username, True, UNKNOWN_LOGIN_TTL)
+
+
+def _forget_unknown_logins(*logins: str) -> None:
+    """Drop cached misses for logins that now exist."""
+    for login in logins:
+        _unknown_logins.pop(login)
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user by username and password.
@@ -122,12 +236,25 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     Returns:
         User object if authentication successful, None otherwise
     """
-    # Try to find user by username or email
-    user = db.query(User).filter(
-        (User.username == username) | (User.email == username)
-    ).first()
+    if _unknown_logins.get(username, False):
+        # Still spend a bcrypt check so a cached miss takes as long as a wrong password
+        verify_password(password, _DUMMY_HASH)
+        logger.warning(f"Authentication failed: User '{username}' not found")
+        return None
+    
+    # Look up the one column the login can match, so each query is a single
+    # unique-index seek instead of an OR across both indexes
+    if "@" in username:
+        user = db.query(User).filter(User.email == username).first()
+        if not user:
+            # Usernames are not validated, so one may still contain "@"
+            user = db.query(User).filter(User.username == username).first()
+    else:
+        user = db.query(User).filter(User.username == username).first()
     
     if not user:
+        verify_password(password, _DUMMY_HASH)
+        _remember_unknown_login(username)
         logger.warning(f"Authentication failed: User '{username}' not found")
         return None
     
@@ -139,6 +266,15 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     return user
 
 
+def _credentials_exception() -> HTTPException:
+    """Build the 401 raised for a bad token; only done on the failure path."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers=_BEARER_CHALLENGE,
+    )
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends()
@@ -157,21 +293,18 @@ def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
     token_data = decode_access_token(token)
     
     if token_data is None or token_data.username is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    user = db.query(User).filter(User.username == token_data.username).first()
+    # Only the identity and credential columns; the rest (e.g. timestamps) load on first access
+    user = db.query(User).options(
+        load_only(User.id, User.username, User.email, User.hashed_password)
+    ).filter(User.username == token_data.username).first()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     return user
 
@@ -236,6 +369,7 @@ def create_user(db: Session, username: str, email: str, password: str) -> User:
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    _forget_unknown_logins(username, email)
     
     logger.info(f"New user created: {username}")
     
@@ -263,7 +397,7 @@ def change_password(
         True if password changed successfully
         
     Raises:
-        ValueError: If old password is incorrect
+        ValueError: If old password is incorrect or the new password is the same
     """
     user = db.query(User).filter(User.id == user_id).first()
     
@@ -274,6 +408,10 @@ def change_password(
     if not verify_password(old_password, user.hashed_password):
         raise ValueError("Current password is incorrect")
     
+    # Nothing to change; skip hashing the same password again
+    if new_password == old_password:
+        raise ValueError("New password must be different from the current password")
+    
     # Update to new password
     user.hashed_password = hash_password(new_password)
     db.commit()
@@ -353,7 +491,7 @@ def refresh_access_token(refresh_token: str) -> Optional[str]:
         access_token = create_access_token(data={"sub": username})
         return access_token
         
-    except JWTError:
+    except InvalidTokenError:
         return None
 
 
@@ -395,7 +533,7 @@ def verify_email_token(token: str) -> Optional[str]:
         email: Optional[str] = payload.get("sub")
         return email
         
-    except JWTError:
+    except InvalidTokenError:
         return None
 
 
@@ -414,18 +552,38 @@ def is_strong_password(password: str) -> tuple[bool, str]:
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
     
-    if not any(char.isdigit() for char in password):
+    # One pass over the password for all three character classes
+    has_digit = has_upper = has_lower = False
+    for char in password:
+        if char.isdigit():
+            has_digit = True
+        elif char.isupper():
+            has_upper = True
+        elif char.islower():
+            has_lower = True
+        else:
+            continue
+        if has_digit and has_upper and has_lower:
+            break
+    
+    if not has_digit:
         return False, "Password must contain at least one number"
     
-    if not any(char.isupper() for char in password):
+    if not has_upper:
         return False, "Password must contain at least one uppercase letter"
     
-    if not any(char.islower() for char in password):
+    if not has_lower:
         return False, "Password must contain at least one lowercase letter"
     
     return True, "Password is strong"
 
 
+# str.translate table deleting every ASCII character sanitize_username drops
+_USERNAME_DELETE_TABLE = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(128)) if not (c.isalnum() or c == '_')
+))
+
+
 def sanitize_username(username: str) -> str:
     """
     Sanitize username (remove special characters, convert to lowercase).
@@ -437,7 +595,10 @@ def sanitize_username(username: str) -> str:
         Sanitized username
     """
     # Remove special characters, keep only alphanumeric and underscore
-    sanitized = ''.join(c for c in username if c.isalnum() or c == '_')
+    if username.isascii():
+        sanitized = username.translate(_USERNAME_DELETE_TABLE)
+    else:
+        sanitized = ''.join(c for c in username if c.isalnum() or c == '_')
     return sanitized.lower()
 
 
@@ -447,7 +608,7 @@ def sanitize_username(username: str) -> str:
 IMPORTANT SETUP STEPS:
 
 1. Install required packages:
-   pip install python-jose[cryptography] passlib[bcrypt] python-multipart
+   pip install pyjwt bcrypt python-multipart
 
 2. Generate a secure SECRET_KEY for production:
    python -c "import secrets; print(secrets.token_urlsafe(32))"
@@ -4,15 +4,18 @@ Handles task completion logic, XP rewards, streaks, and task management.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, cast
 import logging
 from models import Task, User
-from services.xp_manager import add_xp, XP_REWARDS
+from services.xp_manager import add_xp, XpReason, XP_REWARD_AMOUNTS
 
 logger = logging.getLogger(__name__)
 
+# Columns listed by get_today_tasks, selected as plain rows instead of ORM instances
+_TODAY_TASK_COLUMNS = (Task.id, Task.title, Task.is_completed)
+
 
 def get_utc_now() -> datetime:
     """Get current UTC time (timezone-aware)."""
@@ -55,11 +58,16 @@ def complete_task(
             }
         
         # Mark as completed
+        completed_at = get_utc_now()
         task.is_completed = True
-        task.completed_at = get_utc_now()  # type: ignore[assignment]
+        task.completed_at = completed_at  # type: ignore[assignment]
+        
+        # Read what the response needs now: committing expires the task, and
+        # reloading it would cost another SELECT
+        task_title = task.title
         
         # Award XP
-        xp_reward = task.xp_reward or XP_REWARDS["task_completion"]
+        xp_reward = task.xp_reward or XP_REWARD_AMOUNTS[XpReason.TASK_COMPLETION]
         
         # If no category specified, use a default (you should have a "General" category)
         if not category_id:
@@ -70,11 +78,10 @@ def complete_task(
             user_id=user_id,
             category_id=category_id,
             amount=xp_reward,
-            reason=f"Completed task: {task.title}"
+            reason=f"Completed task: {task_title}"
         )
         
         db.commit()
-        db.refresh(task)
         
         logger.info(f"User {user_id} completed task {task_id} and earned {xp_reward} XP")
         
@@ -82,10 +89,10 @@ def complete_task(
             "success": True,
             "message": "Task completed successfully!",
             "task_id": task_id,
-            "task_title": task.title,
+            "task_title": task_title,
             "xp_earned": xp_reward,
             "xp_details": xp_result,
-            "completed_at": task.completed_at
+            "completed_at": completed_at
         }
         
     except Exception as e:
@@ -125,9 +132,9 @@ def incomplete_task(db: Session, user_id: int, task_id: int) -> Dict:
         
         task.is_completed = False
         task.completed_at = None  # type: ignore[assignment]
+        task_title = task.title
         
         db.commit()
-        db.refresh(task)
         
         logger.info(f"User {user_id} uncompleted task {task_id}")
         
@@ -135,7 +142,7 @@ def incomplete_task(db: Session, user_id: int, task_id: int) -> Dict:
             "success": True,
             "message": "Task marked as incomplete",
             "task_id": task_id,
-            "task_title": task.title
+            "task_title": task_title
         }
         
     except Exception as e:
@@ -273,26 +280,26 @@ def get_today_tasks(db: Session, user_id: int) -> Dict:
         user_id: User ID
         
     Returns:
-        Dictionary with today's tasks categorized
+        Dictionary with today's tasks categorized (tasks as id/title/is_completed rows)
     """
     try:
         today_start = get_utc_now().replace(hour=0, minute=0, second=0, microsecond=0)
         today_end = today_start + timedelta(days=1)
         
-        # Tasks due today
-        due_today = db.query(Task).filter(
+        # Tasks due today, as plain (id, title, is_completed) rows
+        due_today = db.query(*_TODAY_TASK_COLUMNS).filter(
             Task.user_id == user_id,
             Task.due_date >= today_start,  # type: ignore[operator]
             Task.due_date < today_end  # type: ignore[operator]
         ).all()
         
-        # Tasks completed today
-        completed_today = db.query(Task).filter(
+        # Tasks completed today (only the count is needed)
+        completed_today = db.query(func.count(Task.id)).filter(
             Task.user_id == user_id,
             Task.is_completed == True,
             Task.completed_at >= today_start,  # type: ignore[operator]
             Task.completed_at < today_end  # type: ignore[operator]
-        ).all()
+        ).scalar()
         
         incomplete = [t for t in due_today if not t.is_completed]
         complete = [t for t in due_today if t.is_completed]
@@ -300,7 +307,7 @@ def get_today_tasks(db: Session, user_id: int) -> Dict:
         return {
             "date": today_start.date().isoformat(),
             "due_today": len(due_today),
-            "completed_today": len(completed_today),
+            "completed_today": completed_today,
             "incomplete_tasks": incomplete,
             "completed_tasks": complete,
             "completion_rate": (len(complete) / len(due_today) * 100) if due_today else 0
@@ -329,33 +336,61 @@ def bulk_complete_tasks(
     Returns:
         Dictionary with completion results
     """
+    results = {
+        "completed": [],
+        "already_completed": [],
+        "not_found": [],
+        "total_xp_earned": 0
+    }
+    
     try:
-        results = {
-            "completed": [],
-            "already_completed": [],
-            "not_found": [],
-            "total_xp_earned": 0
+        # One query for the whole batch instead of one per task
+        tasks = {
+            task.id: task
+            for task in db.query(Task).filter(
+                Task.user_id == user_id,
+                Task.id.in_(set(task_ids))
+            )
         }
         
+        now = get_utc_now()
         for task_id in task_ids:
-            try:
-                result = complete_task(db, user_id, task_id, category_id)
-                
-                if result["success"]:
-                    results["completed"].append({
-                        "task_id": task_id,
-                        "title": result["task_title"],
-                        "xp_earned": result["xp_earned"]
-                    })
-                    results["total_xp_earned"] += result["xp_earned"]
-                else:
-                    results["already_completed"].append(task_id)
-                    
-            except ValueError:
-                results["not_found"].append(task_id)
-            except Exception as e:
-                logger.error(f"Error completing task {task_id}: {str(e)}")
+            task = tasks.get(task_id)
+            
+            if task is None:
                 results["not_found"].append(task_id)
+                continue
+            
+            if task.is_completed:
+                results["already_completed"].append(task_id)
+                continue
+            
+            task.is_completed = True
+            task.completed_at = now  # type: ignore[assignment]
+            
+            xp_reward = task.xp_reward or XP_REWARD_AMOUNTS[XpReason.TASK_COMPLETION]
+            results["completed"].append({
+                "task_id": task_id,
+                "title": task.title,
+                "xp_earned": xp_reward
+            })
+            results["total_xp_earned"] += xp_reward
+        
+        if results["completed"]:
+            # Award the XP for the whole batch at once; add_xp commits the
+            # task updates along with it
+            add_xp(
+                db=db,
+                user_id=user_id,
+                category_id=category_id or 1,  # Assuming 1 is your default/general category
+                amount=results["total_xp_earned"],
+                reason=f"Completed {len(results['completed'])} tasks"
+            )
+        
+        logger.info(
+            f"User {user_id} bulk completed {len(results['completed'])} tasks "
+            f"and earned {results['total_xp_earned']} XP"
+        )
         
         return {
             "success": True,
@@ -369,6 +404,21 @@ def bulk_complete_tasks(
         raise
 
 
+def _completion_seconds(db: Session):
+    """
+    SQL expression for the seconds between a task's creation and completion.
+    
+    Args:
+        db: Database session (the expression depends on its dialect)
+        
+    Returns:
+        SQL expression, NULL when either timestamp is missing
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(Task.completed_at) - func.julianday(Task.created_at)) * 86400
+    return func.extract("epoch", Task.completed_at - Task.created_at)
+
+
 def get_task_statistics(db: Session, user_id: int, days: int = 30) -> Dict:
     """
     Get detailed task statistics for a user over a period.
@@ -382,45 +432,35 @@ def get_task_statistics(db: Session, user_id: int, days: int = 30) -> Dict:
         Dictionary with task statistics
     """
     try:
-        start_date = get_utc_now() - timedelta(days=days)
-        
-        # All tasks in period
-        all_tasks = db.query(Task).filter(
+        now = get_utc_now()
+        start_date = now - timedelta(days=days)
+        
+        # Aggregate in SQL rather than loading every task in the period
+        total_tasks, completed, overdue, avg_completion_seconds, total_xp = db.query(
+            func.count(Task.id),
+            func.coalesce(func.sum(case((Task.is_completed, 1), else_=0)), 0),
+            func.coalesce(func.sum(case(
+                (and_(Task.is_completed.is_(False), Task.due_date < now), 1),  # type: ignore[operator]
+                else_=0
+            )), 0),
+            func.avg(case((Task.is_completed, _completion_seconds(db)))),
+            func.coalesce(func.sum(case((Task.is_completed, Task.xp_reward), else_=0)), 0),
+        ).filter(
             Task.user_id == user_id,
             Task.created_at >= start_date  # type: ignore[operator]
-        ).all()
+        ).one()
         
-        # Completed tasks in period
-        completed = [t for t in all_tasks if t.is_completed]
-        
-        # Overdue tasks
-        now = get_utc_now()
-        overdue = [
-            t for t in all_tasks
-            if not t.is_completed and t.due_date and t.due_date < now  # type: ignore[operator]
-        ]
-        
-        # Calculate average completion time
-        completion_times = []
-        for task in completed:
-            if task.completed_at is not None and task.created_at is not None:
-                # Convert both to datetime for subtraction
-                completed_dt = task.completed_at if isinstance(task.completed_at, datetime) else task.completed_at
-                created_dt = task.created_at if isinstance(task.created_at, datetime) else task.created_at
-                time_diff = (completed_dt - created_dt).total_seconds() / 3600  # type: ignore[operator]
-                completion_times.append(time_diff)
-        
-        avg_completion_time = sum(completion_times) / len(completion_times) if completion_times else 0
+        avg_completion_time = float(avg_completion_seconds or 0) / 3600
         
         return {
             "period_days": days,
-            "total_tasks": len(all_tasks),
-            "completed_tasks": len(completed),
-            "incomplete_tasks": len(all_tasks) - len(completed),
-            "overdue_tasks": len(overdue),
-            "completion_rate": (len(completed) / len(all_tasks) * 100) if all_tasks else 0,
+            "total_tasks": total_tasks,
+            "completed_tasks": completed,
+            "incomplete_tasks": total_tasks - completed,
+            "overdue_tasks": overdue,
+            "completion_rate": (completed / total_tasks * 100) if total_tasks else 0,
             "average_completion_time_hours": round(avg_completion_time, 2),
-            "total_xp_earned": sum(t.xp_reward for t in completed),
+            "total_xp_earned": total_xp,
         }
         
     except Exception as e:
@@ -4,7 +4,13 @@ Handles all XP, leveling, and progression logic for Seikatsu.
 """
 
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Tuple
+from sqlalchemy import select, update
+from typing import Optional, Dict, List, Tuple
+from types import MappingProxyType
+from enum import IntEnum
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
 import logging
 from models import Level, UserStats, User, Category
 from schemas import LevelProgress
@@ -16,14 +22,36 @@ logger = logging.getLogger(__name__)
 XP_BASE = 100  # XP needed for level 2
 XP_MULTIPLIER = 1.5  # Exponential growth factor
 
-# XP Rewards Configuration
-XP_REWARDS = {
+# XP Rewards Configuration (read-only; look rewards up by XpReason where possible)
+XP_REWARDS = MappingProxyType({
     "journal_entry": 20,
     "task_completion": 10,
     "daily_streak": 5,
     "weekly_goal": 50,
     "monthly_goal": 200,
-}
+})
+
+
+class XpReason(IntEnum):
+    """Reasons XP is awarded; index XP_REWARD_AMOUNTS with them."""
+    JOURNAL_ENTRY = 0
+    TASK_COMPLETION = 1
+    DAILY_STREAK = 2
+    WEEKLY_GOAL = 3
+    MONTHLY_GOAL = 4
+
+
+# XP reward per XpReason, indexed by the enum value
+XP_REWARD_AMOUNTS = tuple(XP_REWARDS[reason.name.lower()] for reason in XpReason)
+
+# Levels covered by the precomputed tables below; higher levels are computed
+MAX_TABLE_LEVEL = 200
+
+# _LEVEL_COST[n - 1]: XP needed to go from level n to level n + 1
+_LEVEL_COST = tuple(int(XP_BASE * (XP_MULTIPLIER ** i)) for i in range(MAX_TABLE_LEVEL))
+
+# _CUMULATIVE_XP[n - 1]: total XP needed to reach level n
+_CUMULATIVE_XP = tuple(accumulate(_LEVEL_COST, initial=0))
 
 
 def calculate_level(xp: int) -> int:
@@ -41,8 +69,14 @@ def calculate_level(xp: int) -> int:
     if xp <= 0:
         return 1
     
-    level = 1
-    xp_needed = XP_BASE
+    # Number of level thresholds already reached
+    if xp < _CUMULATIVE_XP[-1]:
+        return bisect_right(_CUMULATIVE_XP, xp)
+    
+    # Beyond the table: keep levelling up from its last level
+    level = len(_CUMULATIVE_XP)
+    xp -= _CUMULATIVE_XP[-1]
+    xp_needed = int(XP_BASE * (XP_MULTIPLIER ** (level - 1)))
     
     while xp >= xp_needed:
         xp -= xp_needed
@@ -65,8 +99,11 @@ def get_xp_for_level(level: int) -> int:
     if level <= 1:
         return 0
     
-    total_xp = 0
-    for lvl in range(1, level):
+    if level <= len(_CUMULATIVE_XP):
+        return _CUMULATIVE_XP[level - 1]
+    
+    total_xp = _CUMULATIVE_XP[-1]
+    for lvl in range(len(_CUMULATIVE_XP), level):
         total_xp += int(XP_BASE * (XP_MULTIPLIER ** (lvl - 1)))
     
     return total_xp
@@ -82,18 +119,26 @@ def get_xp_for_next_level(current_level: int) -> int:
     Returns:
         XP required for next level
     """
+    if 1 <= current_level <= MAX_TABLE_LEVEL:
+        return _LEVEL_COST[current_level - 1]
     return int(XP_BASE * (XP_MULTIPLIER ** (current_level - 1)))
 
 
-def calculate_level_progress(xp: int) -> LevelProgress:
+# LevelProgress field names, in the order _level_progress_values returns them
+_LEVEL_PROGRESS_FIELDS = tuple(LevelProgress.model_fields)
+
+
+@lru_cache(maxsize=4096)
+def _level_progress_values(xp: int) -> Tuple[int, int, int, int, float, int, int]:
     """
-    Calculate detailed level progression information.
+    Compute the LevelProgress fields for an XP total, in field order.
+    Memoized, since many users and categories share XP values (0, reward multiples).
     
     Args:
         xp: Total experience points
         
     Returns:
-        LevelProgress schema with detailed progression data
+        Tuple of LevelProgress field values
     """
     current_level = calculate_level(xp)
     current_level_threshold = get_xp_for_level(current_level)
@@ -103,17 +148,44 @@ def calculate_level_progress(xp: int) -> LevelProgress:
     xp_needed_for_next_level = next_level_threshold - xp
     progress_percentage = (progress_in_current_level / (next_level_threshold - current_level_threshold)) * 100
     
-    return LevelProgress(
-        current_level=current_level,
-        total_xp=xp,
-        progress_in_current_level=progress_in_current_level,
-        xp_needed_for_next_level=xp_needed_for_next_level,
-        progress_percentage=round(progress_percentage, 2),
-        current_level_threshold=current_level_threshold,
-        next_level_threshold=next_level_threshold,
+    return (
+        current_level,
+        xp,
+        progress_in_current_level,
+        xp_needed_for_next_level,
+        round(progress_percentage, 2),
+        current_level_threshold,
+        next_level_threshold,
     )
 
 
+def _level_progress_dict(xp: int) -> Dict:
+    """
+    Level progression for an XP total as a plain dict (LevelProgress fields),
+    for responses that don't need the schema object.
+    
+    Args:
+        xp: Total experience points
+        
+    Returns:
+        New dictionary with the LevelProgress fields
+    """
+    return dict(zip(_LEVEL_PROGRESS_FIELDS, _level_progress_values(xp)))
+
+
+def calculate_level_progress(xp: int) -> LevelProgress:
+    """
+    Calculate detailed level progression information.
+    
+    Args:
+        xp: Total experience points
+        
+    Returns:
+        LevelProgress schema with detailed progression data
+    """
+    return LevelProgress(**_level_progress_dict(xp))
+
+
 def check_level_up(old_xp: int, new_xp: int) -> Tuple[bool, int, int]:
     """
     Check if adding XP causes a level up.
@@ -126,110 +198,187 @@ def check_level_up(old_xp: int, new_xp: int) -> Tuple[bool, int, int]:
         Tuple of (leveled_up: bool, old_level: int, new_level: int)
     """
     old_level = calculate_level(old_xp)
+    
+    # Common case: new_xp is still within old_level's band, no second lookup needed
+    if (
+        old_level < len(_CUMULATIVE_XP)
+        and _CUMULATIVE_XP[old_level - 1] <= new_xp < _CUMULATIVE_XP[old_level]
+    ):
+        return False, old_level, old_level
+    
     new_level = calculate_level(new_xp)
     
     return new_level > old_level, old_level, new_level
 
 
-def add_xp(
+def _load_level_and_stats(
     db: Session,
     user_id: int,
-    category_id: int,
-    amount: int,
-    reason: Optional[str] = None
-) -> Dict:
+    category_id: int
+) -> Tuple[Optional[Level], Optional[UserStats]]:
     """
-    Add XP to a specific category and check for level-up.
-    Also updates overall user stats.
+    Load and lock a user's level in one category, together with their overall
+    stats, for a read-modify-write in the same transaction.
     
     Args:
         db: Database session
         user_id: User ID
-        category_id: Category ID to add XP to
-        amount: Amount of XP to add
-        reason: Optional reason for XP gain (for logging)
+        category_id: Category ID
         
     Returns:
-        Dictionary with level up info and updated stats
+        Tuple of (category level, user stats); both None if the level is missing
     """
-    try:
-        # Get or create category level
-        category_level = db.query(Level).filter(
-            Level.user_id == user_id,
-            Level.category_id == category_id
-        ).first()
+    # FOR UPDATE OF levels: the stats side of the outer join can't be locked
+    row = db.query(Level, UserStats).outerjoin(
+        UserStats, UserStats.user_id == Level.user_id
+    ).filter(
+        Level.user_id == user_id,
+        Level.category_id == category_id
+    ).with_for_update(of=Level).first()
+    
+    return (row[0], row[1]) if row else (None, None)
+
+
+def _add_xp_in_place(
+    db: Session,
+    model,
+    xp_attr: str,
+    amount: int,
+    **keys
+) -> Tuple[int, int, bool, int]:
+    """
+    Add XP to a Level or UserStats row with one UPDATE ... RETURNING (no read,
+    modify, write round trips), creating the row if it doesn't exist yet.
+    
+    Args:
+        db: Database session
+        model: Level or UserStats
+        xp_attr: Name of the model's XP column
+        amount: Amount of XP to add
+        **keys: Column values identifying the row (e.g. user_id, category_id)
         
-        if not category_level:
-            # Create new level entry for this category
-            category_level = Level(
-                user_id=user_id,
-                category_id=category_id,
-                level=1,
-                xp=0
-            )
-            db.add(category_level)
+    Returns:
+        Tuple of (new_xp, level, leveled_up, old_level)
+    """
+    xp_column = getattr(model, xp_attr)
+    row = db.execute(
+        update(model)
+        .filter_by(**keys)
+        .values({xp_attr: xp_column + amount})
+        .returning(xp_column, model.level)
+    ).first()
+    
+    new_xp, stored_level = row if row else (amount, None)
+    
+    # The level is derived from XP; the stored column is only a copy kept for
+    # SQL readers, written when it differs (a level-up or earlier drift)
+    leveled_up, old_level, new_level = check_level_up(new_xp - amount, new_xp)
+    
+    if not row:
+        db.add(model(**keys, level=new_level, **{xp_attr: new_xp}))
+    elif stored_level != new_level:
+        db.execute(update(model).filter_by(**keys).values(level=new_level))
+    
+    return new_xp, new_level, leveled_up, old_level
+
+
+def _current_xp(db: Session, user_id: int, category_id: int) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Read a user's XP in one category and overall, in one round trip.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        category_id: Category ID
         
-        # Store old XP for level check
-        old_xp = category_level.xp
+    Returns:
+        Tuple of (category xp, total xp), each None if the row is missing
+    """
+    return db.execute(select(
+        select(Level.xp).where(
+            Level.user_id == user_id, Level.category_id == category_id
+        ).scalar_subquery(),
+        select(UserStats.total_xp).where(UserStats.user_id == user_id).scalar_subquery(),
+    )).one()
+
+
+def _no_xp_added(db: Session, user_id: int, category_id: int) -> Dict:
+    """
+    Result of an add_xp call that awards nothing, without writing anything.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        category_id: Category ID
         
-        # Add XP
-        category_level.xp += amount
-        new_xp = category_level.xp
+    Returns:
+        Dictionary shaped like add_xp's result
+    """
+    category_xp, total_xp = _current_xp(db, user_id, category_id)
+    category_xp, total_xp = category_xp or 0, total_xp or 0
+    
+    return {
+        "success": True,
+        "xp_added": 0,
+        "category_level": calculate_level(category_xp),
+        "category_xp": category_xp,
+        "category_leveled_up": False,
+        "old_category_level": None,
+        "new_category_level": None,
+        "total_xp": total_xp,
+        "overall_level": calculate_level(total_xp),
+        "overall_leveled_up": False,
+    }
+
+
+def _award_xp(db: Session, user_id: int, category_id: int, amount: int) -> Dict:
+    """
+    Add XP in place to a category level and the user's overall stats, then commit.
+    Shared by add_xp and add_xp_bulk so both return the same result shape.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        category_id: Category ID to add XP to
+        amount: Total amount of XP to add
         
-        # Check for level up
-        leveled_up, old_level, new_level = check_level_up(old_xp, new_xp)
+    Returns:
+        Dictionary with level up info and updated stats
+    """
+    try:
+        # Add to the category level and overall stats in place (atomic on the DB)
+        category_xp, category_level, leveled_up, old_level = _add_xp_in_place(
+            db, Level, "xp", amount, user_id=user_id, category_id=category_id
+        )
         
         if leveled_up:
-            category_level.level = new_level
             logger.info(
                 f"User {user_id} leveled up in category {category_id}: "
-                f"Level {old_level} -> {new_level}"
+                f"Level {old_level} -> {category_level}"
             )
         
-        # Update overall user stats
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-        
-        if not user_stats:
-            # Create user stats if doesn't exist
-            user_stats = UserStats(user_id=user_id, level=1, total_xp=0)
-            db.add(user_stats)
-        
-        # Update total XP
-        old_total_xp = user_stats.total_xp
-        user_stats.total_xp += amount
-        new_total_xp = user_stats.total_xp
-        
-        # Check for overall level up
-        overall_leveled_up, old_overall_level, new_overall_level = check_level_up(
-            old_total_xp, new_total_xp
+        total_xp, overall_level, overall_leveled_up, old_overall_level = _add_xp_in_place(
+            db, UserStats, "total_xp", amount, user_id=user_id
         )
         
         if overall_leveled_up:
-            user_stats.level = new_overall_level
             logger.info(
                 f"User {user_id} overall level up: "
-                f"Level {old_overall_level} -> {new_overall_level}"
+                f"Level {old_overall_level} -> {overall_level}"
             )
         
         db.commit()
-        db.refresh(category_level)
-        db.refresh(user_stats)
-        
-        logger.info(
-            f"Added {amount} XP to user {user_id} in category {category_id}. "
-            f"Reason: {reason or 'N/A'}"
-        )
         
         return {
             "success": True,
             "xp_added": amount,
-            "category_level": category_level.level,
-            "category_xp": category_level.xp,
+            "category_level": category_level,
+            "category_xp": category_xp,
             "category_leveled_up": leveled_up,
             "old_category_level": old_level if leveled_up else None,
-            "new_category_level": new_level if leveled_up else None,
-            "total_xp": user_stats.total_xp,
-            "overall_level": user_stats.level,
+            "new_category_level": category_level if leveled_up else None,
+            "total_xp": total_xp,
+            "overall_level": overall_level,
             "overall_leveled_up": overall_leveled_up,
         }
         
@@ -239,6 +388,83 @@ def add_xp(
         raise
 
 
+def add_xp(
+    db: Session,
+    user_id: int,
+    category_id: int,
+    amount: int,
+    reason: Optional[str] = None
+) -> Dict:
+    """
+    Add XP to a specific category and check for level-up.
+    Also updates overall user stats.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        category_id: Category ID to add XP to
+        amount: Amount of XP to add
+        reason: Optional reason for XP gain (for logging)
+        
+    Returns:
+        Dictionary with level up info and updated stats
+    """
+    # Nothing to award (e.g. a zero reward in a chain): skip the writes
+    if amount == 0:
+        return _no_xp_added(db, user_id, category_id)
+    
+    result = _award_xp(db, user_id, category_id, amount)
+    
+    # Logged on every award: lazy %-formatting costs nothing when INFO is off
+    logger.info(
+        "Added %s XP to user %s in category %s. Reason: %s",
+        amount, user_id, category_id, reason or "N/A"
+    )
+    
+    return result
+
+
+def add_xp_bulk(
+    db: Session,
+    user_id: int,
+    category_id: int,
+    entries: List[Dict]
+) -> Dict:
+    """
+    Add several XP awards to one category in a single transaction.
+    Equivalent to calling add_xp once per entry, but the category level and
+    user stats each get a single in-place UPDATE, and the whole sync is
+    committed once.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        category_id: Category ID to add XP to
+        entries: XP awards, each a dict with "amount" and optional "reason"
+        
+    Returns:
+        Dictionary with level up info and updated stats (same shape as add_xp)
+    """
+    amount = sum(entry["amount"] for entry in entries)
+    if amount == 0:
+        return _no_xp_added(db, user_id, category_id)
+    
+    result = _award_xp(db, user_id, category_id, amount)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        for entry in entries:
+            logger.debug(
+                "Added %s XP to user %s in category %s. Reason: %s",
+                entry["amount"], user_id, category_id, entry.get("reason") or "N/A"
+            )
+    logger.info(
+        "Added %s XP to user %s in category %s from %s awards",
+        amount, user_id, category_id, len(entries)
+    )
+    
+    return result
+
+
 def deduct_xp(
     db: Session,
     user_id: int,
@@ -260,12 +486,24 @@ def deduct_xp(
     Returns:
         Dictionary with updated stats
     """
+    if amount == 0:
+        # Nothing to deduct: report the current state without locking or writing
+        category_xp, total_xp = _current_xp(db, user_id, category_id)
+        if category_xp is None:
+            raise ValueError(f"No level found for category {category_id}")
+        
+        return {
+            "success": True,
+            "xp_deducted": 0,
+            "category_level": calculate_level(category_xp),
+            "category_xp": category_xp,
+            "total_xp": total_xp or 0,
+            "overall_level": calculate_level(total_xp or 0),
+        }
+    
     try:
-        # Get category level
-        category_level = db.query(Level).filter(
-            Level.user_id == user_id,
-            Level.category_id == category_id
-        ).first()
+        # Get the category level and overall user stats in one round trip
+        category_level, user_stats = _load_level_and_stats(db, user_id, category_id)
         
         if not category_level:
             raise ValueError(f"No level found for category {category_id}")
@@ -279,24 +517,13 @@ def deduct_xp(
         category_level.level = calculate_level(category_level.xp)
         
         # Update overall user stats
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-        
         if user_stats:
             old_total_xp = user_stats.total_xp
             user_stats.total_xp = max(0, user_stats.total_xp - actual_deduction)
             user_stats.level = calculate_level(user_stats.total_xp)
         
-        db.commit()
-        db.refresh(category_level)
-        if user_stats:
-            db.refresh(user_stats)
-        
-        logger.info(
-            f"Deducted {actual_deduction} XP from user {user_id} in category {category_id}. "
-            f"Reason: {reason or 'N/A'}"
-        )
-        
-        return {
+        # Read both rows before the commit expires them
+        result = {
             "success": True,
             "xp_deducted": actual_deduction,
             "category_level": category_level.level,
@@ -305,6 +532,15 @@ def deduct_xp(
             "overall_level": user_stats.level if user_stats else 1,
         }
         
+        db.commit()
+        
+        logger.info(
+            "Deducted %s XP from user %s in category %s. Reason: %s",
+            actual_deduction, user_id, category_id, reason or "N/A"
+        )
+        
+        return result
+        
     except Exception as e:
         db.rollback()
         logger.error(f"Error deducting XP for user {user_id}: {str(e)}")
@@ -323,38 +559,46 @@ def get_user_level_details(db: Session, user_id: int) -> Dict:
         Dictionary with overall stats and per-category breakdowns
     """
     try:
-        # Get overall user stats
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-        
-        if not user_stats:
+        # Overall XP and every category level with its name in one query: one
+        # row per category, or a single row with no category if there are none.
+        # Levels are derived from XP in Python (memoized per XP total)
+        rows = db.query(
+            UserStats.total_xp, Level.category_id, Category.name, Level.xp
+        ).outerjoin(
+            Level, Level.user_id == UserStats.user_id
+        ).outerjoin(
+            Category, Category.id == Level.category_id
+        ).filter(UserStats.user_id == user_id).all()
+        
+        if not rows:
             return {
                 "overall": {
                     "level": 1,
                     "total_xp": 0,
-                    "progress": calculate_level_progress(0).dict()
+                    "progress": _level_progress_dict(0)
                 },
                 "categories": []
             }
         
-        # Get category levels
-        category_levels = db.query(Level).filter(Level.user_id == user_id).all()
+        total_xp = rows[0].total_xp
         
         categories = []
-        for cat_level in category_levels:
-            category = db.query(Category).filter(Category.id == cat_level.category_id).first()
+        for _, category_id, category_name, xp in rows:
+            if category_id is None:
+                continue
             categories.append({
-                "category_id": cat_level.category_id,
-                "category_name": category.name if category else "Unknown",
-                "level": cat_level.level,
-                "xp": cat_level.xp,
-                "progress": calculate_level_progress(cat_level.xp).dict()
+                "category_id": category_id,
+                "category_name": category_name or "Unknown",
+                "level": calculate_level(xp),
+                "xp": xp,
+                "progress": _level_progress_dict(xp)
             })
         
         return {
             "overall": {
-                "level": user_stats.level,
-                "total_xp": user_stats.total_xp,
-                "progress": calculate_level_progress(user_stats.total_xp).dict()
+                "level": calculate_level(total_xp),
+                "total_xp": total_xp,
+                "progress": _level_progress_dict(total_xp)
             },
             "categories": categories
         }